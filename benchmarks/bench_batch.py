@@ -0,0 +1,110 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+""" Scaling benchmark for the batch engine.
+
+The batch engine runs the same detection on a video file or an image directory with an increasing
+number of worker processes. For each number of processes the benchmark reports the frames per
+second, the speedup over one process and the parallel efficiency (speedup per process).
+
+With --check the tables of each run are compared with the tables of one process reading all frames
+as a single chunk, which shows frames that are lost or duplicated at the chunk boundaries.
+
+Usage:
+
+    python benchmarks/bench_batch.py <video file or image directory> [--task faces|markers]
+                                     [--processes 1,2,4] [--cascades <path>] [--check]
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+
+import numpy as np
+
+from spy.batch import TASKS, T_FACES, run
+
+
+def isEqual(result, reference):
+    """ This function returns whether two results of the batch engine have the same frames and
+        rows.
+    """
+    (frames, tables), (ref_frames, ref_tables) = result, reference
+
+    return ( frames == ref_frames and sorted(tables) == sorted(ref_tables)
+             and all(np.array_equal(tables[table], ref_tables[table]) for table in ref_tables) )
+
+
+def main():
+    cores  = multiprocessing.cpu_count()
+
+    parser = argparse.ArgumentParser(description = 'Benchmark the scaling of the batch engine.')
+    parser.add_argument( 'input',
+                         help       = 'Video file or directory of images.')
+    parser.add_argument( '-t', '--task',
+                         dest       = 'task',
+                         choices    = TASKS,
+                         default    = T_FACES,
+                         help       = 'Detection to run.')
+    parser.add_argument( '-p', '--processes',
+                         dest       = 'processes',
+                         default    = ','.join( str(count) for count in sorted(set(
+                                                [ 1, 2, 4, 8, 16, cores ])) if count <= cores ),
+                         help       = 'Comma separated numbers of worker processes.')
+    parser.add_argument( '--chunk-size',
+                         dest       = 'chunk_size',
+                         type       = type(0),
+                         default    = 64,
+                         help       = 'Number of consecutive frames per work item.')
+    parser.add_argument( '-c', '--cascades',
+                         dest       = 'cascades',
+                         default    = '',
+                         help       = 'Search path for cascade files.')
+    parser.add_argument( '--check',
+                         dest       = 'check',
+                         action     = 'store_true',
+                         help       = 'Compare the results with the ones of a single chunk.')
+    args   = parser.parse_args()
+
+    reference = None
+    if args.check:
+        reference = run(args.input, None, args.task, 1, sys.maxint, args.cascades)
+
+    print '%-10s %10s %10s %10s %12s %8s' % ('processes', 'frames', 'fps', 'speedup',
+                                             'efficiency', 'equal')
+    base   = None
+
+    for processes in [ int(count) for count in args.processes.split(',') ]:
+
+        start     = time.time()
+        result    = run( args.input,
+                         None,
+                         args.task,
+                         processes,
+                         args.chunk_size,
+                         args.cascades )
+        frames    = result[0]
+        fps       = frames / (time.time() - start)
+        base      = base or fps
+        equal     = '-' if reference is None else ('yes' if isEqual(result, reference) else 'no')
+
+        print '%-10d %10d %10.1f %10.2f %12.2f %8s' % (processes, frames, fps, fps / base,
+                                                       fps / base / processes, equal)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+""" Tree walking benchmark for the BottleReader.
+
+The benchmark compares the former recursive walker of the BottleReader with the current one that
+is built on the BottleEvents stream. Both call the same counting hooks on two synthetic bottles:
+
+wide:   one list with many values of mixed types
+deep:   lists nested into each other with a few values per level
+
+The former walker fails with a RuntimeError once the nesting exceeds the recursion limit.
+
+Usage:
+
+    python benchmarks/bench_bottle_reader.py [--width 10000] [--depth 500] [--repeat 20]
+"""
+import argparse
+import time
+
+import yarp
+
+from spy.reader.bottle_reader import BottleReader
+
+
+class CountingReader(BottleReader):
+    """ BottleReader that counts the values. """
+
+    def readVocab(self, value):
+        self.data['values'] = self.data.get('values', 0) + 1
+
+    readDouble = readInt = readString = readVocab
+
+
+class FormerReader(CountingReader):
+    """ CountingReader with the former recursive walker. """
+
+    def _readBottle(self, bottle):
+
+        for idx in range(bottle.size()):
+            item = bottle.get(idx)
+
+            if isinstance(item, yarp.Value):
+                self._readValue(item)
+
+            elif isinstance(item, yarp.Bottle):
+                self._readBottle(item)
+
+
+    def _readValue(self, value):
+
+        if value.isVocab():
+            self.readVocab(value)
+
+        elif value.isDouble():
+            self.readDouble(value)
+
+        elif value.isInt():
+            self.readInt(value)
+
+        elif value.isList():
+            self.onListStart()
+            self._readBottle( value.asList() )
+            self.onListEnd()
+
+        else:
+            raise NotImplementedError('Value type is not known to the parser: %s' % value)
+
+
+def addValues(bottle, count):
+    """ This function adds vocabs, doubles and integers to a bottle. """
+    for idx in range(count):
+        if idx % 3 == 0:
+            bottle.addVocab(yarp.encode('POS'))
+        elif idx % 3 == 1:
+            bottle.addDouble(idx * 0.5)
+        else:
+            bottle.addInt(idx)
+
+
+def wideBottle(width):
+    bottle = yarp.Bottle()
+    addValues(bottle.addList(), width)
+    return bottle
+
+
+def deepBottle(depth):
+    bottle = yarp.Bottle()
+    level  = bottle
+
+    for _ in range(depth):
+        addValues(level, 3)
+        level = level.addList()
+
+    return bottle
+
+
+def measure(reader, bottle, repeat):
+    """ This function returns the time per bottle in ms or None if the walker failed. """
+    start = time.time()
+
+    try:
+        for _ in range(repeat):
+            reader(bottle)
+    except RuntimeError:
+        return None
+
+    return (time.time() - start) * 1000.0 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark the BottleReader tree walking.')
+    parser.add_argument( '-w', '--width',
+                         dest       = 'width',
+                         type       = type(0),
+                         default    = 10000,
+                         help       = 'Number of values of the wide bottle.')
+    parser.add_argument( '-d', '--depth',
+                         dest       = 'depth',
+                         type       = type(0),
+                         default    = 500,
+                         help       = 'Nesting depth of the deep bottle.')
+    parser.add_argument( '-r', '--repeat',
+                         dest       = 'repeat',
+                         type       = type(0),
+                         default    = 20,
+                         help       = 'Number of runs per bottle.')
+    args   = parser.parse_args()
+
+    yarp.Network.init()
+
+    print '%-8s %-10s %14s' % ('bottle', 'walker', 'time [ms]')
+
+    for name, bottle in (('wide', wideBottle(args.width)), ('deep', deepBottle(args.depth))):
+        for walker, reader in (('former', FormerReader), ('current', CountingReader)):
+            elapsed = measure(reader, bottle, args.repeat)
+            print '%-8s %-10s %14s' % ( name, walker,
+                                        'failed' if elapsed is None else '%.3f' % elapsed )
+
+
+if __name__ == '__main__':
+    main()
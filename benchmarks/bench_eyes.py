@@ -0,0 +1,106 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+""" Eye detection benchmark for the OCFaceDetector.
+
+The benchmark compares the eye detection with one cascade run per face against the batched
+detection of spy.detectors.faces.detectEyes, which searches all faces in one mosaic. A crowd is
+made by tiling the first recorded frame that contains a face into a grid, so the faces are the
+same for all crowd sizes. For each number of faces it reports the latency of both methods and the
+number of eyes found.
+
+Usage:
+
+    python benchmarks/bench_eyes.py <frame directory> [--faces 1,4,9,16] [--cascades <path>]
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from spy.detectors.faces        import CASCADES, detectEyes, findFaces
+from spy.utils                  import getFiles
+
+
+def detectEyesPerFace(gray, faces):
+    """ This function detects the eyes with one cascade run per face and no size limits. """
+    return [ CASCADES['eye'].detectMultiScale(gray[y:y + height, x:x + width])
+             for (x, y, width, height) in faces ]
+
+
+def measure(func, gray, faces, repeat):
+    """ This function returns the mean latency in milliseconds and the number of eyes found. """
+    start = time.time()
+
+    for _ in range(repeat):
+        eyes = func(gray, faces)
+
+    return (time.time() - start) / repeat * 1000.0, sum(len(face_eyes) for face_eyes in eyes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark the batched eye detection.')
+    parser.add_argument( 'frames',
+                         help       = 'Directory containing the recorded frames.')
+    parser.add_argument( '-f', '--faces',
+                         dest       = 'faces',
+                         default    = '1,4,9,16',
+                         help       = 'Comma separated numbers of faces.')
+    parser.add_argument( '-c', '--cascades',
+                         dest       = 'cascades',
+                         default    = '',
+                         help       = 'Search path for cascade files.')
+    parser.add_argument( '-r', '--repeat',
+                         dest       = 'repeat',
+                         type       = type(0),
+                         default    = 10,
+                         help       = 'Number of runs per measurement.')
+    args   = parser.parse_args()
+
+    if args.cascades:
+        CASCADES.setPaths(args.cascades)
+
+    for path in sorted(getFiles(args.frames)):
+        frame = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        faces = findFaces(frame) if frame is not None else ()
+
+        if len(faces) > 0:
+            break
+    else:
+        raise SystemExit('No frame with a face found in [%s].' % args.frames)
+
+    # the largest face of the frame is repeated in a grid
+    face          = max(faces, key = lambda box: box[2] * box[3])
+    height, width = frame.shape[:2]
+    counts        = [ int(count) for count in args.faces.split(',') ]
+    side          = int(np.ceil(np.sqrt(max(counts))))
+    crowd         = np.tile(frame, (side, side))
+    boxes         = [ (face[0] + col * width, face[1] + row * height, face[2], face[3])
+                      for row in range(side) for col in range(side) ]
+
+    print 'face size %dx%d' % (face[2], face[3])
+    print '%-6s %14s %8s %14s %8s' % ('faces', 'per face [ms]', 'eyes', 'mosaic [ms]', 'eyes')
+
+    for count in counts:
+        t_face,   e_face   = measure(detectEyesPerFace, crowd, boxes[:count], args.repeat)
+        t_mosaic, e_mosaic = measure(detectEyes,        crowd, boxes[:count], args.repeat)
+        print '%-6d %14.2f %8d %14.2f %8d' % (count, t_face, e_face, t_mosaic, e_mosaic)
+
+
+if __name__ == '__main__':
+    main()
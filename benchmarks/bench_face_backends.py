@@ -0,0 +1,123 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+""" Backend benchmark for the OCFaceDetector.
+
+Each face detector backend runs on the same recorded frame set. For each backend the benchmark
+reports the frames per second, the p50, p95 and p99 latency per frame and the number of faces
+found. With --eyes the latency includes the eye detection within the faces. Backends whose model
+files are not available are skipped.
+
+Usage:
+
+    python benchmarks/bench_face_backends.py <frame directory> [--backends haar,lbp,dnn]
+                                             [--dnn-model <caffemodel> --dnn-config <prototxt>]
+"""
+import argparse
+import time
+
+import cv2
+
+from spy.detectors.faces        import createDetector, detectFaces
+from spy.modules.OCFaceDetector import parseSize
+from spy.utils                  import getFiles
+
+
+def run(frames, eyes, **options):
+    """ This function runs the face detection on all frames.
+
+    @return frames per second, sorted list of latencies in seconds, number of faces
+    """
+    latencies = []
+    found     = 0
+    start     = time.time()
+
+    for gray in frames:
+        t_frame  = time.time()
+        faces, _ = detectFaces(gray, eyes, **options)
+        latencies.append(time.time() - t_frame)
+        found   += len(faces)
+
+    return len(frames) / (time.time() - start), sorted(latencies), found
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark the face detector backends.')
+    parser.add_argument( 'frames',
+                         help       = 'Directory containing the recorded frames.')
+    parser.add_argument( '-b', '--backends',
+                         dest       = 'backends',
+                         default    = 'haar,lbp,dnn',
+                         help       = 'Comma separated backends.')
+    parser.add_argument( '-e', '--eyes',
+                         dest       = 'eyes',
+                         action     = 'store_true',
+                         help       = 'Detect the eyes within the faces as well.')
+    parser.add_argument( '-d', '--detect-size',
+                         dest       = 'detect_size',
+                         type       = parseSize,
+                         default    = None,
+                         help       = 'Run the detection on a downscaled image e.g. 320x240.')
+    parser.add_argument( '--min-size',
+                         dest       = 'min_size',
+                         type       = parseSize,
+                         default    = None,
+                         help       = 'Smallest face size in input pixels.')
+    parser.add_argument( '--dnn-model',
+                         dest       = 'dnn_model',
+                         default    = None,
+                         help       = 'Weights of the dnn backend.')
+    parser.add_argument( '--dnn-config',
+                         dest       = 'dnn_config',
+                         default    = None,
+                         help       = 'Network description of the dnn backend.')
+    args   = parser.parse_args()
+
+    frames = [ cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in sorted(getFiles(args.frames)) ]
+    frames = [ frame for frame in frames if frame is not None ]
+
+    if not frames:
+        raise SystemExit('No frames found in [%s].' % args.frames)
+
+    print '%-8s %10s %10s %10s %10s %8s' % ('backend', 'fps', 'p50 [ms]', 'p95 [ms]', 'p99 [ms]',
+                                            'faces')
+
+    for name in args.backends.split(','):
+
+        try:
+            detector = createDetector(name, model = args.dnn_model, config = args.dnn_config)
+
+            # the first frame loads the model and is not measured
+            options  = { 'detector':    detector,
+                         'detect_size': args.detect_size,
+                         'min_size':    args.min_size }
+            detectFaces(frames[0], args.eyes, **options)
+
+        except (KeyError, ValueError), e:
+            print '%-8s skipped: %s' % (name, e)
+            continue
+
+        fps, latencies, found = run(frames, args.eyes, **options)
+        last                  = len(latencies) - 1
+        _ms                   = lambda percent: latencies[min(last, int(last * percent))] * 1000.0
+
+        print '%-8s %10.1f %10.2f %10.2f %10.2f %8d' % (name, fps, _ms(0.50), _ms(0.95), _ms(0.99),
+                                                        found)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+""" Detection resolution benchmark for the OCFaceDetector.
+
+The face detection runs on a recorded frame set at several detection resolutions. For each
+resolution the benchmark reports frames per second and the recall against the detections at full
+input resolution. A face counts as found if a box overlaps it with an IoU of at least 0.5.
+
+Usage:
+
+    python benchmarks/bench_face_scale.py <frame directory> [--sizes 320x240,160x120]
+"""
+import argparse
+import time
+
+import cv2
+
+from spy.detectors.faces        import findFaces
+from spy.modules.OCFaceDetector import parseSize
+from spy.utils                  import getFiles
+
+
+def iou(box_a, box_b):
+    """ This function returns the intersection over union of two (x, y, width, height) boxes. """
+    left   = max(box_a[0], box_b[0])
+    top    = max(box_a[1], box_b[1])
+    right  = min(box_a[0] + box_a[2], box_b[0] + box_b[2])
+    bottom = min(box_a[1] + box_a[3], box_b[1] + box_b[3])
+
+    inter  = max(0, right - left) * max(0, bottom - top)
+    union  = box_a[2] * box_a[3] + box_b[2] * box_b[3] - inter
+    return float(inter) / union if union > 0 else 0.0
+
+
+def recall(reference, detections):
+    """ This function returns the number of reference boxes matched by a detection. """
+    return sum( 1 for ref in reference if any(iou(ref, det) >= 0.5 for det in detections) )
+
+
+def run(frames, **options):
+    """ This function runs the face detection on all frames.
+
+    @return frames per second, list of detections per frame
+    """
+    results = []
+    start   = time.time()
+
+    for gray in frames:
+        results.append(findFaces(gray, **options))
+
+    return len(frames) / (time.time() - start), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark face detection resolutions.')
+    parser.add_argument( 'frames',
+                         help       = 'Directory containing the recorded frames.')
+    parser.add_argument( '-s', '--sizes',
+                         dest       = 'sizes',
+                         default    = '480x360,320x240,240x180,160x120',
+                         help       = 'Comma separated detection resolutions.')
+    parser.add_argument( '--min-size',
+                         dest       = 'min_size',
+                         type       = parseSize,
+                         default    = None,
+                         help       = 'Smallest face size in input pixels.')
+    parser.add_argument( '--max-size',
+                         dest       = 'max_size',
+                         type       = parseSize,
+                         default    = None,
+                         help       = 'Largest face size in input pixels.')
+    args   = parser.parse_args()
+
+    frames = [ cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in sorted(getFiles(args.frames)) ]
+    frames = [ frame for frame in frames if frame is not None ]
+
+    if not frames:
+        raise SystemExit('No frames found in [%s].' % args.frames)
+
+    # warm up the cascade and use the full resolution detections as reference
+    findFaces(frames[0])
+    fps, reference = run(frames, min_size = args.min_size, max_size = args.max_size)
+    total          = sum(len(faces) for faces in reference)
+
+    height, width  = frames[0].shape[:2]
+    print '%-12s %10s %10s' % ('resolution', 'fps', 'recall')
+    print '%-12s %10.1f %10s' % ('%dx%d' % (width, height), fps, '1.000')
+
+    for size in args.sizes.split(','):
+        fps, results = run( frames,
+                            detect_size = parseSize(size),
+                            min_size    = args.min_size,
+                            max_size    = args.max_size )
+
+        found = sum(recall(ref, det) for ref, det in zip(reference, results))
+        print '%-12s %10.1f %10.3f' % (size, fps, float(found) / total if total else 1.0)
+
+
+if __name__ == '__main__':
+    main()
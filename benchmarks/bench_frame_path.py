@@ -0,0 +1,221 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+""" Frame path benchmark for the image modules.
+
+The benchmark drives the process() method of HCMarker and OCFaceDetector on a sequence of frames.
+The yarp ports are replaced by stubs: the input port copies the next frame into the input buffer of
+the module and the output ports have a reader but drop everything, so the modules draw and publish
+as if someone was connected. Everything else, from the grayscale conversion over the motion gate
+and the detection to the drawing, is the code of the modules.
+
+For each module it reports the time per frame and an estimate of the memory newly allocated per
+frame, also given in grayscale frames. The new memory is estimated from the minor page faults of
+the process: large blocks are taken from the system with mmap (the threshold is lowered to 64 KiB)
+and each of their pages faults when it is first written, while reused buffers cause no page
+faults. Allocations that malloc serves from freed heap memory are not seen. The page fault
+counting needs glibc; otherwise only the time is reported.
+
+The gray, gradient and edge images of the marker detector are reused. What HCMarker still allocates
+per frame is beyond the reach of output buffers: Canny's internal edge map (about one gray frame),
+the contour points returned by findContours, which grow with the number of edge pixels, and the
+samples of the marker candidates, which grow with their number. On noisy frames the contours
+dominate.
+
+Usage:
+
+    python benchmarks/bench_frame_path.py [<frame directory>] [--size 640x480] [--frames 200]
+                                          [--cascades <path>]
+"""
+import argparse
+import ctypes
+import resource
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from spy.detectors.hamming      import generateMarker
+from spy.modules.HCMarker       import HCMarker
+from spy.modules.HCMarker       import createArgParser as createMarkerParser
+from spy.modules.OCFaceDetector import OCFaceDetector, parseSize
+from spy.modules.OCFaceDetector import createArgParser as createFaceParser
+from spy.utils                  import getFiles
+
+
+# mallopt parameter of the mmap threshold of glibc
+M_MMAP_THRESHOLD = -3
+
+
+class StubImage(object):
+    """ The StubImage class stands in for the yarp image of a buffer array. """
+
+    def __init__(self, array):
+        self.array = array
+
+    def getRawImage(self):
+        return long(self.array.__array_interface__['data'][0])
+
+    def width(self):
+        return self.array.shape[1]
+
+    def height(self):
+        return self.array.shape[0]
+
+
+class StubInputPort(object):
+    """ The StubInputPort class copies the next frame of a sequence into the given image. """
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.index  = 0
+
+    def read(self, buf_image):
+        np.copyto(buf_image.array, self.frames[self.index % len(self.frames)])
+        self.index += 1
+        return True
+
+
+class StubOutputPort(object):
+    """ The StubOutputPort class has one reader and drops all messages. """
+
+    def getOutputCount(self):
+        return 1
+
+    def getName(self):
+        return '/stub:o'
+
+    def write(self, *args):
+        return True
+
+
+def createModule(module_class, create_parser, argv, width, height, frames):
+    """ This function creates a module with stub ports and buffers of the frame size.
+
+    @param module_class  - module class
+    @param create_parser - createArgParser function of the module
+    @param argv          - command line arguments of the module
+    @return module
+    """
+    sys.argv = [ module_class.__name__ ] + argv
+    module   = module_class(create_parser())
+
+    for name in ( 'markersPort', 'orderPort', 'translationPort', 'facesPort', 'skeletonPort',
+                  'eyesPort', 'imgOutPort' ):
+        setattr(module, name, StubOutputPort())
+
+    module.imgInPort       = StubInputPort(frames)
+    module.bufArrayIn      = np.zeros((height, width, 3), dtype = np.uint8)
+    module.bufImageIn      = StubImage(module.bufArrayIn)
+    module.bufGray         = np.empty((height, width), dtype = np.uint8)
+    module.order           = HCMarker.O_HORIZONTAL
+    module.orderIsReversed = False
+    return module
+
+
+def createFrames(path, width, height, count = 20):
+    """ This function returns the frames of a directory or synthetic frames with a moving marker.
+
+    @return list of RGB image arrays of the given size
+    """
+    if path:
+        frames = [ cv2.imread(filename) for filename in sorted(getFiles(path)) ]
+        return [ cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), (width, height))
+                 for frame in frames if frame is not None ]
+
+    marker = cv2.cvtColor(generateMarker(123), cv2.COLOR_GRAY2RGB)
+    noise  = np.random.randint(0, 64, (height, width, 3)).astype(np.uint8)
+    frames = []
+
+    for idx in range(count):
+        frame = noise.copy()
+        x, y  = 20 + idx * 5, 40 + idx * 3
+        frame[y:y + marker.shape[0], x:x + marker.shape[1]] = marker
+        frames.append(frame)
+
+    return frames
+
+
+def measure(module, frames):
+    """ This function calls process() of the module once per frame.
+
+    @return time per frame in ms, new memory per frame in bytes
+    """
+    page_size = resource.getpagesize()
+    module.process()
+
+    faults    = resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+    start     = time.time()
+
+    for _ in range(frames):
+        module.process()
+
+    elapsed   = time.time() - start
+    faults    = resource.getrusage(resource.RUSAGE_SELF).ru_minflt - faults
+
+    return elapsed * 1000.0 / frames, float(faults) * page_size / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark the frame path of the image modules.')
+    parser.add_argument( 'frames',
+                         nargs      = '?',
+                         default    = '',
+                         help       = 'Directory containing recorded frames (default: synthetic).')
+    parser.add_argument( '-s', '--size',
+                         dest       = 'size',
+                         type       = parseSize,
+                         default    = (640, 480),
+                         help       = 'Frame size e.g. 640x480.')
+    parser.add_argument( '-f', '--frames',
+                         dest       = 'count',
+                         type       = type(0),
+                         default    = 200,
+                         help       = 'Number of processed frames.')
+    parser.add_argument( '-c', '--cascades',
+                         dest       = 'cascades',
+                         default    = '',
+                         help       = 'Search path for cascade files.')
+    args   = parser.parse_args()
+
+    try:
+        counted = ctypes.CDLL(None).mallopt(M_MMAP_THRESHOLD, 64 * 1024) == 1
+    except (OSError, AttributeError):
+        counted = False
+
+    width, height = args.size
+    frames        = createFrames(args.frames, width, height)
+    cascades      = [ '--cascades', args.cascades ] if args.cascades else []
+    modules       = [ ('HCMarker',       HCMarker,       createMarkerParser, []),
+                      ('OCFaceDetector', OCFaceDetector, createFaceParser,   cascades) ]
+
+    print '%-16s %12s %16s %14s' % ('module', 'time [ms]', 'new memory [KiB]', 'gray frames')
+
+    for name, module_class, create_parser, argv in modules:
+        module             = createModule(module_class, create_parser, argv, width, height, frames)
+        elapsed, allocated = measure(module, args.count)
+
+        if counted:
+            print '%-16s %12.2f %16.1f %14.2f' % ( name, elapsed, allocated / 1024.0,
+                                                   allocated / (width * height) )
+        else:
+            print '%-16s %12.2f %16s %14s' % (name, elapsed, 'n/a', 'n/a')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+""" Accuracy and throughput benchmark for the builtin Hamming marker detector.
+
+The benchmark runs the builtin detector of spy.detectors.hamming and, if installed, the detector
+of the ar_markers package on the same frames. The frames are either a recorded frame set, i.e. a
+directory of images, or synthetic frames with perspective distorted markers on a cluttered
+background.
+
+For each detector it reports the time per frame. The accuracy is given as the share of frames on
+which the detector finds the same marker ids as the reference, which is the known ids for
+synthetic frames and the ar_markers detector for recorded ones.
+
+Usage:
+
+    python benchmarks/bench_hamming.py [--frames <directory>] [--count 100] [--markers 4]
+"""
+import argparse
+import glob
+import os.path as op
+import time
+
+import cv2
+import numpy as np
+
+from spy.detectors.hamming import detectMarkers, generateMarker
+
+try:
+    from ar_markers.hamming.detect import detect_markers
+except ImportError:
+    detect_markers = None
+
+
+def loadFrames(directory):
+    """ This function loads the images of a directory in the RGB channel order. """
+    frames = []
+
+    for path in sorted(glob.glob(op.join(directory, '*'))):
+        image = cv2.imread(path)
+
+        if image is not None:
+            frames.append( (cv2.cvtColor(image, cv2.COLOR_BGR2RGB), None) )
+
+    return frames
+
+
+def syntheticFrame(rng, markers, clutter, width = 640, height = 480):
+    """ This function renders markers with random ids, rotations and perspective on a background
+        with random rectangles.
+
+    @return image, set of marker ids
+    """
+    image = np.full( (height, width), 255, dtype = np.uint8 )
+
+    for _ in range(clutter):
+        x, y  = rng.randint(0, width), rng.randint(0, height)
+        w, h  = rng.randint(5, 60, 2)
+        color = int(rng.randint(0, 256))
+        cv2.rectangle(image, (x, y), (x + w, y + h), color, -1 if rng.rand() < 0.5 else 2)
+
+    ids   = set()
+    slot  = width // markers
+
+    for idx in range(markers):
+        mid    = int(rng.randint(0, 4096))
+        marker = np.pad(generateMarker(mid, 10), 10, 'constant', constant_values = 255)
+        marker = np.rot90(marker, rng.randint(4)).copy()
+        size   = marker.shape[0]
+
+        # random perspective inside the slot of the marker
+        side   = rng.randint(70, min(slot, height) - 10)
+        left   = idx * slot + rng.randint(0, slot - side)
+        top    = rng.randint(0, height - side)
+        src    = np.float32([ [0, 0], [size, 0], [size, size], [0, size] ])
+        dst    = np.float32([ [left, top], [left + side, top], [left + side, top + side],
+                              [left, top + side] ]) + rng.uniform(-8, 8, (4, 2)).astype(np.float32)
+
+        matrix = cv2.getPerspectiveTransform(src, dst)
+        warped = cv2.warpPerspective(marker, matrix, (width, height))
+        mask   = cv2.warpPerspective(np.full_like(marker, 255), matrix, (width, height)) > 0
+
+        image[mask] = warped[mask]
+        ids.add(mid)
+
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2RGB), ids
+
+
+def run(detector, frames):
+    """ This function runs a detector on all frames.
+
+    @return time per frame in ms, list of id sets
+    """
+    found = []
+    start = time.time()
+
+    for image, _ in frames:
+        found.append(set( marker.id for marker in detector(image) ))
+
+    return (time.time() - start) * 1000.0 / len(frames), found
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark the builtin Hamming marker detector.')
+    parser.add_argument( '-f', '--frames',
+                         dest       = 'frames',
+                         default    = None,
+                         help       = 'Directory of recorded frames.')
+    parser.add_argument( '-c', '--count',
+                         dest       = 'count',
+                         type       = type(0),
+                         default    = 100,
+                         help       = 'Number of synthetic frames.')
+    parser.add_argument( '-m', '--markers',
+                         dest       = 'markers',
+                         type       = type(0),
+                         default    = 4,
+                         help       = 'Number of markers per synthetic frame.')
+    parser.add_argument( '--clutter',
+                         dest       = 'clutter',
+                         type       = type(0),
+                         default    = 200,
+                         help       = 'Number of background rectangles per synthetic frame.')
+    args   = parser.parse_args()
+
+    if args.frames:
+        frames = loadFrames(args.frames)
+    else:
+        rng    = np.random.RandomState(0)
+        frames = [ syntheticFrame(rng, args.markers, args.clutter) for _ in range(args.count) ]
+
+    detectors = [ ('builtin', detectMarkers) ]
+
+    if detect_markers is not None:
+        detectors.append( ('ar_markers', detect_markers) )
+    else:
+        print 'ar_markers is not installed, the builtin detector is measured alone'
+
+    results   = dict( (name, run(detector, frames)) for name, detector in detectors )
+
+    # the reference are the known ids or the ar_markers results
+    if args.frames:
+        reference = results['ar_markers'][1] if 'ar_markers' in results else None
+    else:
+        reference = [ ids for _, ids in frames ]
+
+    print '%-12s %14s %12s' % ('detector', 'time [ms]', 'accuracy')
+
+    for name, _ in detectors:
+        elapsed, found = results[name]
+        accuracy       = '-'
+
+        if reference is not None:
+            same     = sum( 1 for ids, ref in zip(found, reference) if ids == ref )
+            accuracy = '%.1f %%' % (100.0 * same / len(frames))
+
+        print '%-12s %14.3f %12s' % (name, elapsed, accuracy)
+
+
+if __name__ == '__main__':
+    main()
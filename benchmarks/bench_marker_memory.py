@@ -0,0 +1,162 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+""" Soak benchmark for the marker memory of HCMarker.
+
+The benchmark simulates a long running HCMarker with marker memory on a simulated clock. In each
+frame a few markers out of a large pool of ids are detected. It compares the former memory, a dict
+of HammingMarker objects that is never evicted and scanned completely in each frame, with the
+current MarkerMemory of MarkerRecords.
+
+At regular checkpoints it reports the number of stored markers, the bytes held by the memory and
+the time per frame since the last checkpoint. The current memory stays flat.
+
+Usage:
+
+    python benchmarks/bench_marker_memory.py [--hours 4] [--ids 4096] [--length 2] [--size 0]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from spy.models.marker import MarkerRecord
+from spy.utils.memory  import MarkerMemory
+
+
+FPS = 30
+
+
+class HammingMarker(object):
+    """ Stand-in for the HammingMarker of the ar_markers package. """
+
+    def __init__(self, mid, contours):
+        self.id       = mid
+        self.contours = contours
+
+
+class FormerMemory(object):
+    """ The former marker memory of HCMarker. """
+
+    def __init__(self, length):
+        self.length = length
+        self.memory = {}
+
+    def __len__(self):
+        return len(self.memory)
+
+    def update(self, markers, cur_time):
+        for marker in markers:
+            self.memory[marker.id] = ( marker, cur_time )
+
+        return [ self.memory[mid][0] for mid in self.memory
+                 if cur_time - self.memory[mid][1] < self.length ]
+
+    def getSize(self):
+        size = sys.getsizeof(self.memory)
+
+        for marker, _ in self.memory.values():
+            size += sys.getsizeof(marker) + sys.getsizeof(marker.__dict__)
+            size += sys.getsizeof(marker.contours)
+
+        return size
+
+
+class CurrentMemory(MarkerMemory):
+
+    def update(self, markers, cur_time):
+        markers = [ MarkerRecord.fromMarker(marker) for marker in markers ]
+        return MarkerMemory.update(self, markers, cur_time)
+
+    def getSize(self):
+        size = sys.getsizeof(self._entries)
+
+        for marker, _ in self._entries.values():
+            size += sys.getsizeof(marker) + sys.getsizeof(marker.contours)
+
+        return size
+
+
+def detections(frames, ids, per_frame):
+    """ This function returns the detected markers of each frame. """
+    contours = np.random.randint(0, 480, (64, 4, 1, 2)).astype(np.int32)
+
+    for _ in range(frames):
+        yield [ HammingMarker(mid, contours[mid % len(contours)])
+                for mid in np.random.randint(0, ids, per_frame) ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Soak benchmark for the marker memory.')
+    parser.add_argument( '--hours',
+                         dest       = 'hours',
+                         type       = float,
+                         default    = 4.0,
+                         help       = 'Simulated run time in hours.')
+    parser.add_argument( '--ids',
+                         dest       = 'ids',
+                         type       = type(0),
+                         default    = 4096,
+                         help       = 'Number of different marker ids.')
+    parser.add_argument( '--markers',
+                         dest       = 'markers',
+                         type       = type(0),
+                         default    = 5,
+                         help       = 'Number of markers per frame.')
+    parser.add_argument( '--length',
+                         dest       = 'length',
+                         type       = float,
+                         default    = 2.0,
+                         help       = 'Memory length in seconds.')
+    parser.add_argument( '--size',
+                         dest       = 'size',
+                         type       = type(0),
+                         default    = 0,
+                         help       = 'Memory size limit of the current memory.')
+    parser.add_argument( '--checkpoints',
+                         dest       = 'checkpoints',
+                         type       = type(0),
+                         default    = 8,
+                         help       = 'Number of reports.')
+    args   = parser.parse_args()
+
+    frames = int(args.hours * 3600 * FPS)
+    step   = max(1, frames / args.checkpoints)
+
+    for name, memory in ( ('former',  FormerMemory(args.length)),
+                          ('current', CurrentMemory(args.length, args.size)) ):
+
+        print '%s memory' % name
+        print '%10s %10s %12s %14s' % ('time [h]', 'markers', 'bytes', 'time [ms]')
+
+        start = time.time()
+
+        for frame, markers in enumerate(detections(frames, args.ids, args.markers)):
+            memory.update(markers, float(frame) / FPS)
+
+            if (frame + 1) % step == 0:
+                elapsed = (time.time() - start) * 1000.0 / step
+                print '%10.2f %10d %12d %14.4f' % ( float(frame + 1) / FPS / 3600, len(memory),
+                                                    memory.getSize(), elapsed )
+                start   = time.time()
+
+        print
+
+
+if __name__ == '__main__':
+    main()
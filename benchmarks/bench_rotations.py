@@ -0,0 +1,119 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+""" Equivalence and throughput benchmark for the quaternion to rotation matrix conversion.
+
+The benchmark first checks the vectorized TSSkeleton.quaternionsToRotationMatrices against the
+scalar reference TSSkeleton.quaternionToRotationMatrix on random quaternions. Then it compares the
+time per frame of the conversion variants for several users:
+
+scalar:   the reference function for each joint of each user
+all:      one vectorized call per user for all joints
+selected: one vectorized call per user for the joints published by TSUserSkeleton
+batch:    one vectorized call for the published joints of all users
+
+Usage:
+
+    python benchmarks/bench_rotations.py [--users 4] [--frames 2000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from spy.models.ts_skeleton import TSSkeleton
+
+
+USED_JOINTS = [ TSSkeleton.HEAD, TSSkeleton.L_HAND, TSSkeleton.R_HAND, TSSkeleton.TORSO ]
+
+
+def skeletons(users):
+    """ This function returns skeletons with random unit quaternions. """
+    result = []
+
+    for userid in range(users):
+        skeleton             = TSSkeleton(userid)
+        quats                = np.random.randn(TSSkeleton.JOINTS, 4)
+        skeleton.quaternions = quats / np.linalg.norm(quats, axis = 1)[:, np.newaxis]
+        result.append(skeleton)
+
+    return result
+
+
+def scalar(users):
+    for skeleton in users:
+        _ = [ TSSkeleton.quaternionToRotationMatrix(quat) for quat in skeleton.quaternions ]
+
+
+def vectorAll(users):
+    for skeleton in users:
+        skeleton.resetRotations()
+        skeleton.getRotationMatrices()
+
+
+def vectorSelected(users):
+    for skeleton in users:
+        skeleton.resetRotations()
+        skeleton.getRotationMatrices(USED_JOINTS)
+
+
+def vectorBatch(users):
+    TSSkeleton.computeRotationMatrices(users, USED_JOINTS)
+
+
+def check(count = 10000):
+    """ This function returns the largest difference between the scalar and the vectorized
+        conversion.
+    """
+    quats     = np.random.randn(count, 4)
+    reference = np.array([ TSSkeleton.quaternionToRotationMatrix(quat) for quat in quats ])
+    return np.abs(TSSkeleton.quaternionsToRotationMatrices(quats) - reference).max()
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark the rotation matrix conversion.')
+    parser.add_argument( '-u', '--users',
+                         dest       = 'users',
+                         type       = type(0),
+                         default    = 4,
+                         help       = 'Number of users per frame.')
+    parser.add_argument( '-f', '--frames',
+                         dest       = 'frames',
+                         type       = type(0),
+                         default    = 2000,
+                         help       = 'Number of frames.')
+    args   = parser.parse_args()
+
+    print 'max. difference to the reference: %g' % check()
+    print
+
+    users  = skeletons(args.users)
+
+    print '%-10s %14s' % ('variant', 'time [ms]')
+
+    for name, convert in ( ('scalar',   scalar),      ('all',   vectorAll),
+                           ('selected', vectorSelected), ('batch', vectorBatch) ):
+        start = time.time()
+
+        for _ in range(args.frames):
+            convert(users)
+
+        print '%-10s %14.4f' % (name, (time.time() - start) * 1000.0 / args.frames)
+
+
+if __name__ == '__main__':
+    main()
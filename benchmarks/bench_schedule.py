@@ -0,0 +1,237 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+""" Scheduling benchmark for the SPY modules.
+
+The benchmark runs an HCMarker module with the 'periodic' and the 'event' scheduling of BaseModule.
+The yarp ports are replaced by stubs: a producer thread sends frames at a fixed rate into a stub
+input port whose read() blocks until a frame arrives and keeps only the newest one, as the image
+input port does. Everything else is the code of the module: updateModule(), getPeriod(), the
+event thread, process() with the marker detection and drawing, interruptModule() and close().
+
+The RFModule loop is replaced by runModule() of this benchmark, which calls updateModule() and
+waits for the rest of getPeriod() as the RFModule does.
+
+It reports the latency between sending a frame and writing the annotated frame, the handled frames
+per second and the CPU time used while no frames arrive.
+
+Usage:
+
+    python benchmarks/bench_schedule.py [--rate 30] [--duration 5] [--size 320x240]
+"""
+import argparse
+import resource
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from spy.detectors.hamming      import generateMarker
+from spy.modules.BaseModule     import BaseModule, SCHEDULES
+from spy.modules.HCMarker       import HCMarker, createArgParser
+from spy.modules.OCFaceDetector import parseSize
+
+
+def cpuTime():
+    """ This function returns the user and system time of the process. """
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class StubImage(object):
+    """ The StubImage class stands in for the yarp image of a buffer array. """
+
+    def __init__(self, array):
+        self.array = array
+
+    def getRawImage(self):
+        return long(self.array.__array_interface__['data'][0])
+
+
+class StubInputPort(object):
+    """ The StubInputPort class provides a blocking read of the newest frame sent to it. """
+
+    def __init__(self):
+        self.stamp        = None
+        self._frame       = None
+        self._sent        = None
+        self._condition   = threading.Condition()
+        self._interrupted = False
+
+    def send(self, frame):
+        with self._condition:
+            self._frame = frame
+            self._sent  = time.time()
+            self._condition.notify()
+
+    def read(self, buf_image):
+        with self._condition:
+            while self._frame is None and not self._interrupted:
+                self._condition.wait(0.1)
+
+            if self._frame is None:
+                return False
+
+            np.copyto(buf_image.array, self._frame)
+            self.stamp  = self._sent
+            self._frame = None
+            return True
+
+    def interrupt(self):
+        with self._condition:
+            self._interrupted = True
+            self._condition.notify()
+
+    def close(self):
+        pass
+
+
+class StubOutputPort(object):
+    """ The StubOutputPort class has one reader and drops all messages. Written images record the
+        latency of the frame that is currently processed.
+    """
+
+    def __init__(self, input_port = None):
+        self.input_port = input_port
+        self.latencies  = []
+
+    def getOutputCount(self):
+        return 1
+
+    def write(self, *args):
+        if self.input_port is not None:
+            self.latencies.append(time.time() - self.input_port.stamp)
+        return True
+
+    def interrupt(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def createModule(schedule, width, height):
+    """ This function creates an HCMarker module with stub ports.
+
+    @param schedule - scheduling policy @see SCHEDULES
+    @return module
+    """
+    sys.argv = [ 'HCMarker', '--schedule', schedule ]
+    module   = HCMarker(createArgParser())
+
+    module.imgInPort       = StubInputPort()
+    module.imgOutPort      = StubOutputPort(module.imgInPort)
+    module.markersPort     = StubOutputPort()
+    module.orderPort       = StubOutputPort()
+    module.translationPort = StubOutputPort()
+    module.bufArrayIn      = np.zeros((height, width, 3), dtype = np.uint8)
+    module.bufImageIn      = StubImage(module.bufArrayIn)
+    module.order           = HCMarker.O_HORIZONTAL
+    module.orderIsReversed = False
+    module._ports          = [ module.imgInPort, module.imgOutPort ]
+    return module
+
+
+def runModule(module, stop):
+    """ This function calls updateModule() every getPeriod() seconds as the RFModule does until
+        the stop event is set or updateModule() returns False.
+    """
+    while not stop.is_set():
+        start = time.time()
+
+        if not module.updateModule():
+            break
+
+        stop.wait(max(0.0, module.getPeriod() - (time.time() - start)))
+
+
+def run(schedule, frame, rate, duration):
+    """ This function runs the module while frames are sent at the given rate.
+
+    @param rate - frames per second; 0 sends no frames
+    @return list of latencies in seconds, CPU time per second
+    """
+    height, width = frame.shape[:2]
+    module        = createModule(schedule, width, height)
+    stop          = threading.Event()
+    loop          = threading.Thread(target = runModule, args = (module, stop))
+
+    start_cpu     = cpuTime()
+    loop.start()
+
+    end           = time.time() + duration
+    while time.time() < end:
+        if rate > 0:
+            module.imgInPort.send(frame)
+            time.sleep(1.0 / rate)
+        else:
+            time.sleep(0.1)
+
+    stop.set()
+    module.interruptModule()
+    loop.join()
+    module.close()
+
+    return module.imgOutPort.latencies, (cpuTime() - start_cpu) / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark the module scheduling policies.')
+    parser.add_argument( '-r', '--rate',
+                         dest       = 'rate',
+                         type       = type(0.0),
+                         default    = 30.0,
+                         help       = 'Frames per second sent to the module.')
+    parser.add_argument( '-d', '--duration',
+                         dest       = 'duration',
+                         type       = type(0.0),
+                         default    = 5.0,
+                         help       = 'Duration of each run in seconds.')
+    parser.add_argument( '-s', '--size',
+                         dest       = 'size',
+                         type       = parseSize,
+                         default    = (320, 240),
+                         help       = 'Frame size e.g. 320x240.')
+    args   = parser.parse_args()
+
+    width, height = args.size
+    marker        = cv2.cvtColor(generateMarker(123), cv2.COLOR_GRAY2RGB)
+    frame         = np.full((height, width, 3), 128, dtype = np.uint8)
+    frame[20:20 + marker.shape[0], 20:20 + marker.shape[1]] = marker
+
+    print 'event period: %.3f s' % BaseModule.EVENT_PERIOD
+    print '%-10s %12s %12s %10s %14s' % ('schedule', 'p50 [ms]', 'p95 [ms]', 'fps', 'idle cpu [%]')
+
+    for schedule in SCHEDULES:
+        latencies, _ = run(schedule, frame, args.rate, args.duration)
+        _, cpu       = run(schedule, frame, 0.0, min(args.duration, 2.0))
+
+        latencies    = sorted(latencies)
+        p50          = latencies[len(latencies) // 2] if latencies else 0.0
+        p95          = latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+
+        print '%-10s %12.1f %12.1f %10.1f %14.2f' % ( schedule,
+                                                      p50 * 1000.0,
+                                                      p95 * 1000.0,
+                                                      len(latencies) / args.duration,
+                                                      cpu * 100.0 )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+""" Memory and throughput benchmark for the TSSkeleton layout.
+
+The benchmark compares the former per joint dictionary layout of TSSkeleton with the current array
+backed one. Both skeletons are filled from the same synthetic OpenNI2 joint values, as the reader
+does, and the four joints published by TSUserSkeleton are read back including their rotation
+matrices.
+
+For each layout it reports the time per frame, the number of Python objects and the number of bytes
+held by one skeleton.
+
+Usage:
+
+    python benchmarks/bench_skeleton_layout.py [--users 4] [--frames 2000]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from spy.models.ts_skeleton import TSSkeleton
+
+
+USED_JOINTS = [ TSSkeleton.HEAD, TSSkeleton.L_HAND, TSSkeleton.R_HAND, TSSkeleton.TORSO ]
+
+
+class FormerSkeleton(object):
+    """ The former TSSkeleton layout with one dictionary of lists per joint. """
+
+    def __init__(self, userid, data_dict):
+        self.uid  = userid
+        self.data = data_dict
+
+        for i in range(len(self.data)):
+            self.data[i]['ORI_RM'] = TSSkeleton.quaternionToRotationMatrix(self.data[i]['ORI'])
+
+
+def joints():
+    """ This function returns synthetic position and orientation values for all joints. """
+    values = []
+
+    for _ in range(TSSkeleton.JOINTS):
+        quat = np.random.randn(4)
+        quat = quat / np.linalg.norm(quat)
+        values.append( (np.random.randn(3).tolist() + [ 1.0 ], quat.tolist() + [ 1.0 ]) )
+
+    return values
+
+
+def formerFrame(userid, values):
+    data = []
+
+    for position, orientation in values:
+        data.append( { 'POS' : [], 'ORI' : [] } )
+        _ = [ data[-1]['POS'].append(value) for value in position ]
+        _ = [ data[-1]['ORI'].append(value) for value in orientation ]
+
+    skeleton = FormerSkeleton(userid, data)
+
+    for joint in USED_JOINTS:
+        j_data = skeleton.data[joint]
+        _ = [j_data['POS'][-1]] + j_data['POS'][:3], j_data['ORI'][-1], j_data['ORI_RM'].flatten()
+
+    return skeleton
+
+
+def currentFrame(userid, values):
+    skeleton = TSSkeleton(userid)
+
+    for joint, (position, orientation) in enumerate(values):
+        skeleton.setJoint(joint, position, orientation)
+
+    rotations = skeleton.getRotationMatrices()
+
+    for joint in USED_JOINTS:
+        _ = skeleton.positions[joint], skeleton.ori_confidences[joint], rotations[joint].flat
+
+    return skeleton
+
+
+def footprint(obj, seen = None):
+    """ This function returns the number of objects and bytes reachable from an object.
+
+    @return objects, bytes
+    """
+    seen = set() if seen is None else seen
+
+    if id(obj) in seen or isinstance(obj, type):
+        return 0, 0
+
+    seen.add(id(obj))
+    objects, size = 1, sys.getsizeof(obj)
+
+    if isinstance(obj, dict):
+        children = obj.keys() + obj.values()
+    elif isinstance(obj, (list, tuple)):
+        children = list(obj)
+    elif isinstance(obj, np.ndarray):
+        children = []
+    elif hasattr(obj, '__dict__'):
+        children = [ obj.__dict__ ]
+    else:
+        children = [ getattr(obj, name) for name in getattr(obj, '__slots__', ())
+                     if hasattr(obj, name) ]
+
+    for child in children:
+        child_objects, child_size = footprint(child, seen)
+        objects += child_objects
+        size    += child_size
+
+    return objects, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark the TSSkeleton layout.')
+    parser.add_argument( '-u', '--users',
+                         dest       = 'users',
+                         type       = type(0),
+                         default    = 4,
+                         help       = 'Number of users per frame.')
+    parser.add_argument( '-f', '--frames',
+                         dest       = 'frames',
+                         type       = type(0),
+                         default    = 2000,
+                         help       = 'Number of frames.')
+    args   = parser.parse_args()
+
+    values = [ joints() for _ in range(args.users) ]
+
+    print '%-10s %14s %10s %10s' % ('layout', 'time [ms]', 'objects', 'bytes')
+
+    for name, frame in (('former', formerFrame), ('current', currentFrame)):
+        start = time.time()
+
+        for _ in range(args.frames):
+            skeletons = [ frame(userid, values[userid]) for userid in range(args.users) ]
+
+        elapsed       = (time.time() - start) * 1000.0 / args.frames
+        objects, size = footprint(skeletons[0])
+        print '%-10s %14.3f %10d %10d' % (name, elapsed, objects, size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+""" Output path benchmark for the TSUserSkeleton.
+
+The benchmark compares the former output path of TSUserSkeleton with the current one for a scene
+with several users:
+
+former:  fresh data and envelope bottles per user, one addDouble call per value
+current: prepared bottles of the output port, all values of a user added with one call
+batch:   as current, but one message per frame carrying all users (--batch)
+
+For each path it reports the time per frame, the messages written per frame and the yarp bottles
+allocated per frame. The output port is opened in local mode and has no readers.
+
+Usage:
+
+    python benchmarks/bench_skeleton_output.py [--users 6] [--frames 1000]
+"""
+import argparse
+import time
+
+import numpy as np
+import yarp
+
+from spy.models.ts_skeleton     import TSSkeleton
+from spy.modules.TSUserSkeleton import TSUserSkeleton
+
+
+class Counter(object):
+    """ Counts the created bottles and written messages. """
+    bottles  = 0
+    messages = 0
+
+
+class CountingBottle(yarp.Bottle):
+
+    def __init__(self, *args):
+        yarp.Bottle.__init__(self, *args)
+        Counter.bottles += 1
+
+
+class CountingPort(object):
+    """ Output port wrapper that counts the written messages. """
+
+    def __init__(self, port):
+        self.port = port
+
+    def __getattr__(self, name):
+        return getattr(self.port, name)
+
+    def write(self, *args):
+        Counter.messages += 1
+        return self.port.write(*args)
+
+
+def formerPublish(module, skeletons):
+    """ The former output path of TSUserSkeleton. """
+    for skeleton in skeletons:
+        bottle    = yarp.Bottle()
+        bottle.clear()
+        rotations = skeleton.getRotationMatrices(module.used_joints)
+
+        for joint in module.used_joints:
+            position = skeleton.positions[joint]
+
+            bottle.addString(TSUserSkeleton.JOINT_NAMES[joint])
+            _ = [bottle.addDouble(value) for value in position[[3, 0, 1, 2]]]
+
+            bottle.addString("Orientation")
+            bottle.addDouble(skeleton.ori_confidences[joint])
+            _ = [bottle.addDouble(value) for value in rotations[joint].flat]
+
+        ebottle   = yarp.Bottle()
+        ebottle.clear()
+        ebottle.addDouble(time.time())
+
+        module.skeletonOutPort.setEnvelope(ebottle)
+        module.skeletonOutPort.write(bottle)
+
+
+def currentPublish(module, skeletons):
+    module.out_envelope.clear()
+    module.out_envelope.addDouble(time.time())
+    module.publishSkeletons(skeletons, module.used_joints)
+
+
+def createModule(batch):
+    args   = argparse.Namespace( name = 'bench', joints = None, batch = batch, no_stats = True,
+                                 stats_period = 0.0, schedule = 'periodic' )
+    module = TSUserSkeleton(args)
+
+    port   = yarp.BufferedPortBottle()
+    port.open('/bench/skeleton:o')
+    module.skeletonOutPort = CountingPort(port)
+    return module
+
+
+def createSkeletons(users):
+    skeletons = []
+
+    for userid in range(users):
+        skeleton                    = TSSkeleton(userid + 1)
+        skeleton.positions[:]       = np.random.randn(TSSkeleton.JOINTS, 4) * 1000.0
+        skeleton.quaternions[:]     = np.random.randn(TSSkeleton.JOINTS, 4)
+        skeleton.ori_confidences[:] = np.random.rand(TSSkeleton.JOINTS)
+        skeletons.append(skeleton)
+
+    return skeletons
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark the TSUserSkeleton output path.')
+    parser.add_argument( '-u', '--users',
+                         dest       = 'users',
+                         type       = type(0),
+                         default    = 6,
+                         help       = 'Number of users per frame.')
+    parser.add_argument( '-f', '--frames',
+                         dest       = 'frames',
+                         type       = type(0),
+                         default    = 1000,
+                         help       = 'Number of frames.')
+    args   = parser.parse_args()
+
+    yarp.Network.init()
+    yarp.Network.setLocalMode(True)
+
+    skeletons = createSkeletons(args.users)
+    TSSkeleton.computeRotationMatrices(skeletons)
+
+    # count the bottles created through yarp.Bottle
+    yarp_bottle = yarp.Bottle
+    yarp.Bottle = CountingBottle
+
+    print '%-10s %14s %16s %16s' % ('path', 'time [ms]', 'messages/frame', 'bottles/frame')
+
+    for name, publish, batch in ( ('former',  formerPublish,  False),
+                                  ('current', currentPublish, False),
+                                  ('batch',   currentPublish, True) ):
+        module           = createModule(batch)
+        Counter.bottles  = 0
+        Counter.messages = 0
+        start            = time.time()
+
+        for _ in range(args.frames):
+            publish(module, skeletons)
+
+        elapsed = (time.time() - start) * 1000.0 / args.frames
+        print '%-10s %14.3f %16.1f %16.1f' % ( name, elapsed,
+                                               float(Counter.messages) / args.frames,
+                                               float(Counter.bottles)  / args.frames )
+        module.skeletonOutPort.close()
+
+    yarp.Bottle = yarp_bottle
+    yarp.Network.fini()
+
+
+if __name__ == '__main__':
+    main()
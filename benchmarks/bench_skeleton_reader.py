@@ -0,0 +1,152 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+""" Parse time benchmark for the TSSkeletonReader.
+
+The benchmark compares the generic tree walker of the BottleReader with the bulk parser for the
+fixed OpenNI2 skeleton layout. It reads a recorded skeleton stream, i.e. the data.log file written
+by yarpdatadumper for the skeleton port of the OpenNI2DeviceServer. Without a recording synthetic
+bottles with the same layout are used.
+
+Both readers have to return the same values, the benchmark stops otherwise.
+
+Usage:
+
+    python benchmarks/bench_skeleton_reader.py [--log data.log] [--users 1] [--repeat 20]
+"""
+import argparse
+import time
+
+import numpy as np
+import yarp
+
+from spy.models.ts_skeleton        import TSSkeleton
+from spy.reader.ts_skeleton_reader import TSSkeletonReader
+
+
+class WalkerReader(TSSkeletonReader):
+    """ TSSkeletonReader without the bulk parser. """
+
+    def _readSkeletons(self, bottle):
+        return False
+
+
+def loadLog(path):
+    """ This function reads the bottles of a yarpdatadumper log, each line is
+        <sequence number> <time stamp> <bottle>.
+    """
+    bottles = []
+
+    with open(path) as log:
+        for line in log:
+            parts = line.split(None, 2)
+
+            if len(parts) == 3:
+                bottle = yarp.Bottle()
+                bottle.fromString(parts[2])
+                bottles.append(bottle)
+
+    return bottles
+
+
+def synthetic(frames, users):
+    """ This function creates bottles in the layout of the OpenNI2DeviceServer. """
+    bottles = []
+
+    for _ in range(frames):
+        bottle = yarp.Bottle()
+
+        for userid in range(users):
+            bottle.addVocab(yarp.encode('USER'))
+            bottle.addInt(userid + 1)
+
+            for _ in range(TSSkeleton.JOINTS):
+                joint = bottle.addList()
+                joint.addVocab(yarp.encode('POS'))
+                position = joint.addList()
+                _ = [ position.addDouble(value) for value in np.random.randn(3) * 1000.0 ]
+                joint.addDouble(np.random.rand())
+                joint.addVocab(yarp.encode('ORI'))
+                orientation = joint.addList()
+                _ = [ orientation.addDouble(value) for value in np.random.randn(4) ]
+                joint.addDouble(np.random.rand())
+
+        bottles.append(bottle)
+
+    return bottles
+
+
+def measure(reader, bottles, repeat):
+    """ This function parses all bottles and returns the time per bottle in microseconds. """
+    start = time.time()
+
+    for _ in range(repeat):
+        for bottle in bottles:
+            reader(bottle).getData()
+
+    return (time.time() - start) * 1000000.0 / (repeat * len(bottles))
+
+
+def compare(bottles):
+    """ This function checks that both readers return the same skeletons. """
+    for bottle in bottles:
+        walker = WalkerReader(bottle).getData()
+        bulk   = TSSkeletonReader(bottle).getData()
+
+        assert sorted(walker) == sorted(bulk), 'different users'
+
+        for key in walker:
+            assert np.allclose(walker[key].positions,       bulk[key].positions)
+            assert np.allclose(walker[key].quaternions,     bulk[key].quaternions)
+            assert np.allclose(walker[key].ori_confidences, bulk[key].ori_confidences)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark the TSSkeletonReader.')
+    parser.add_argument( '-l', '--log',
+                         dest       = 'log',
+                         default    = None,
+                         help       = 'yarpdatadumper log of the skeleton port.')
+    parser.add_argument( '-u', '--users',
+                         dest       = 'users',
+                         type       = type(0),
+                         default    = 1,
+                         help       = 'Number of users per synthetic bottle.')
+    parser.add_argument( '-r', '--repeat',
+                         dest       = 'repeat',
+                         type       = type(0),
+                         default    = 20,
+                         help       = 'Number of passes over the bottles.')
+    args   = parser.parse_args()
+
+    yarp.Network.init()
+
+    bottles = loadLog(args.log) if args.log else synthetic(100, args.users)
+    compare(bottles)
+
+    walker  = measure(WalkerReader,     bottles, args.repeat)
+    bulk    = measure(TSSkeletonReader, bottles, args.repeat)
+
+    print '%-10s %14s' % ('reader', 'time [us]')
+    print '%-10s %14.1f' % ('walker', walker)
+    print '%-10s %14.1f' % ('bulk',   bulk)
+    print
+    print 'speedup: %.1fx' % (walker / bulk)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+""" Startup benchmark for the SPY entry points.
+
+Each script in scripts/ is loaded in a fresh interpreter without running its main block. The
+benchmark reports the import time and the peak resident memory of that interpreter.
+
+Usage:
+
+    python benchmarks/bench_startup.py [--repeat <n>]
+"""
+import argparse
+import json
+import os.path as op
+import subprocess
+import sys
+
+from spy.utils import getFiles
+
+
+ROOT_DIR    = op.dirname(op.dirname(op.abspath(__file__)))
+SCRIPTS_DIR = op.join(ROOT_DIR, 'scripts')
+
+# runs in the child interpreter; the scripts guard main with __name__ == '__main__'
+CHILD_CODE  = """
+import json, resource, runpy, sys, time
+start = time.time()
+runpy.run_path(sys.argv[1], run_name = 'spy_bench_startup')
+elapsed = time.time() - start
+rss     = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print json.dumps({ 'time': elapsed, 'rss': rss,
+                   'modules': len([ m for m in sys.modules.values() if m is not None ]) })
+"""
+
+
+def measure(script):
+    """ This function loads the given script in a fresh interpreter.
+
+    @param script - path of the script
+    @return dictionary containing import time in seconds, peak RSS in kB and module count
+    """
+    output = subprocess.check_output([sys.executable, '-c', CHILD_CODE, script], cwd = ROOT_DIR)
+    return json.loads(output.strip().split('\n')[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Measure import time and RSS of SPY scripts.')
+    parser.add_argument( '-r', '--repeat',
+                         dest       = 'repeat',
+                         type       = type(0),
+                         default    = 5,
+                         help       = 'Number of runs per script; the best run is reported.')
+    args   = parser.parse_args()
+
+    print '%-20s %12s %12s %10s' % ('script', 'import [ms]', 'max rss [kB]', 'modules')
+
+    for script in sorted(getFiles(SCRIPTS_DIR)):
+        runs = [ measure(script) for _ in range(args.repeat) ]
+        best = min(runs, key = lambda run: run['time'])
+
+        print '%-20s %12.1f %12d %10d' % ( op.basename(script),
+                                           best['time'] * 1000.0,
+                                           min(run['rss'] for run in runs),
+                                           best['modules'] )
+
+
+if __name__ == '__main__':
+    main()
@@ -51,6 +51,7 @@ setup( name                 = 'SPY',
        scripts = [
         'scripts/HCMarker',
         'scripts/OCFaceDetector',
+        'scripts/SPYBatch',
         'scripts/TSUserSkeleton'
        ]
      )
@@ -0,0 +1,438 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+""" Offline batch processing of recorded frames.
+
+The batch engine runs the detection of the HCMarker or the OCFaceDetector module on a video file or
+on a directory of images without any yarp ports. The frames are split into chunks of consecutive
+frames which are processed by a pool of worker processes. A worker reads its frames itself, so
+only the results are sent between the processes. A video is opened by each worker at the start of
+its chunk; the position is checked after the seek and corrected by reading frames if necessary.
+
+Each frame is processed on its own, so the motion gate, the face tracking and the marker memory of
+the live modules are not used.
+
+The results are written as one compressed numpy file with one array per column, named
+<table>.<column>:
+
+    faces   - frame x y width height
+    eyes    - frame face x y width height       (with --eyes; face is the row within the frame)
+    markers - frame id center_x center_y p1_x p1_y p2_x p2_y p3_x p3_y p4_x p4_y
+    frames  - name (image directories) or time in seconds (videos)
+
+Example:
+
+    >>> data  = np.load('faces.npz')
+    >>> faces = data['faces.frame'], data['faces.x'], data['faces.y']
+
+Usage:
+
+    SPYBatch <video file or image directory> <output file> [--task faces|markers] [--processes N]
+"""
+import argparse
+import multiprocessing
+import os.path as op
+import time
+
+try:
+    import cv2
+except ImportError:
+    print '[batch] Can not import cv2. The batch processing will raise a RuntimeException.'
+
+import numpy as np
+
+from spy.detectors.faces   import BACKENDS, CASCADES, HaarDetector, createDetector, detectFaces
+from spy.detectors.hamming import detectMarkers
+from spy.utils             import getFiles
+
+
+# detection tasks
+T_FACES   = 'faces'
+T_MARKERS = 'markers'
+TASKS     = [ T_FACES, T_MARKERS ]
+
+# columns of the output tables; the frame column is added by the engine
+COLUMNS   = { 'faces':   ('frame', 'x', 'y', 'width', 'height'),
+              'eyes':    ('frame', 'face', 'x', 'y', 'width', 'height'),
+              'markers': ('frame', 'id', 'center_x', 'center_y',
+                          'p1_x', 'p1_y', 'p2_x', 'p2_y', 'p3_x', 'p3_y', 'p4_x', 'p4_y') }
+
+# tables produced by each task
+TABLES    = { T_FACES:   ('faces', 'eyes'),
+              T_MARKERS: ('markers',) }
+
+
+# task and detection options of a worker process; set by the pool initializer
+_WORKER_TASK    = T_FACES
+_WORKER_OPTIONS = {}
+
+
+def _initWorker(task, options, cascades):
+    """ This function initializes a batch worker process.
+
+    @param task     - detection task @see TASKS
+    @param options  - detection options @see detectFrame
+    @param cascades - search path for cascade files
+    """
+    global _WORKER_TASK, _WORKER_OPTIONS
+    _WORKER_TASK    = task
+    _WORKER_OPTIONS = options
+
+    if cascades:
+        CASCADES.setPaths(cascades)
+
+    # the pool already uses all cores; OpenCV threads within the workers would compete for them
+    cv2.setNumThreads(1)
+
+
+def _processWorker(chunk):
+    """ This function processes a chunk of frames within a worker process.
+
+    @param chunk - chunk @see createChunks
+    @return number of frames, dictionary of table rows @see processChunk
+    """
+    return processChunk(chunk, _WORKER_TASK, **_WORKER_OPTIONS)
+
+
+def getTables(task, eyes = False):
+    """ This function returns the output tables of a task.
+
+    @param task - detection task @see TASKS
+    @param eyes - boolean specifying whether the eyes are detected (default: False)
+    @return list of table names
+    """
+    return [ table for table in TABLES[task] if table != 'eyes' or eyes ]
+
+
+def createChunks(path, chunk_size):
+    """ This function splits the frames of a video file or an image directory into chunks.
+
+    A chunk is a tuple (source, start, stop); start and stop are frame indices. For a video the
+    source is the video file and the stop of the last chunk is None, since the frame count of a
+    video is not always exact. For an image directory the source is the list of the image files of
+    the chunk only, so a chunk stays small for large directories; start is the index of its first
+    frame.
+
+    @param path       - video file or image directory
+    @param chunk_size - number of frames per chunk
+    @return list of chunks, list of frame names or None for a video, frames per second or None
+    """
+    if op.isdir(path):
+        files = sorted(getFiles(path))
+        return ( [ (files[start:start + chunk_size], start, min(start + chunk_size, len(files)))
+                   for start in range(0, len(files), chunk_size) ],
+                 [ op.basename(filename) for filename in files ],
+                 None )
+
+    capture = cv2.VideoCapture(path)
+
+    if not capture.isOpened():
+        raise IOError('Can not open video [%s].' % path)
+
+    count   = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps     = capture.get(cv2.CAP_PROP_FPS) or None
+    capture.release()
+
+    starts  = range(0, count, chunk_size) if count > 0 else [ 0 ]
+    stops   = starts[1:] + [ None ]
+
+    return [ (path, start, stop) for start, stop in zip(starts, stops) ], None, fps
+
+
+def openVideo(source, start):
+    """ This function opens a video at the given frame.
+
+    Seeking by CAP_PROP_POS_FRAMES is not frame exact for all codecs, so the position is checked
+    after the seek. If the seek stopped before the start the missing frames are read; if it went
+    past the start the video is read from its beginning.
+
+    @param source - video file
+    @param start  - index of the first frame to read
+    @return cv2.VideoCapture object
+    """
+    capture = cv2.VideoCapture(source)
+
+    if start > 0:
+        capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+        position = int(round(capture.get(cv2.CAP_PROP_POS_FRAMES)))
+
+        if not 0 <= position <= start:
+            capture.release()
+            capture  = cv2.VideoCapture(source)
+            position = 0
+
+        while position < start and capture.grab():
+            position += 1
+
+    return capture
+
+
+def stackRows(table, rows):
+    """ This function stacks the row arrays of a table.
+
+    @param table - table name @see COLUMNS
+    @param rows  - list of numpy int32 arrays of rows
+    @return numpy int32 array, with no rows if the list is empty
+    """
+    if not rows:
+        return np.zeros( (0, len(COLUMNS[table])), dtype = np.int32 )
+
+    return np.vstack(rows)
+
+
+def readChunk(chunk):
+    """ This function reads the grayscale frames of a chunk. Images that can not be read are
+        skipped, but keep their index.
+
+    @param chunk - (source, start, stop) @see createChunks
+    @return iterator over (frame index, grayscale image)
+    """
+    source, start, stop = chunk
+
+    if isinstance(source, list):
+        for index, filename in enumerate(source, start):
+            gray = cv2.imread(filename, cv2.IMREAD_GRAYSCALE)
+            if gray is not None:
+                yield index, gray
+        return
+
+    capture = openVideo(source, start)
+    index   = start
+
+    try:
+        while stop is None or index < stop:
+            success, image = capture.read()
+            if not success:
+                break
+
+            yield index, cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            index += 1
+
+    finally:
+        capture.release()
+
+
+def detectFrame(gray, task, eyes = False, **options):
+    """ This function runs the detection of a task on one frame.
+
+    @param gray    - grayscale image
+    @param task    - detection task @see TASKS
+    @param eyes    - boolean specifying whether to detect the eyes of the faces (default: False)
+    @param options - face detection options @see spy.detectors.faces.findFaces
+    @return dictionary of table name and numpy int32 array of rows without the frame column
+    """
+    if task == T_MARKERS:
+
+        # a marker may be found more than once; as in HCMarker the last one is kept
+        markers = dict( (marker.id, marker) for marker in detectMarkers(None, gray) )
+        rows    = [ (mid,) + markers[mid].center + tuple(markers[mid].contours.flat)
+                    for mid in sorted(markers) ]
+
+        return { 'markers': np.array(rows, dtype = np.int32).reshape(-1, 11) }
+
+    faces, face_eyes = detectFaces(gray, eyes, **options)
+    faces            = np.asarray(faces, dtype = np.int32).reshape(-1, 4)
+    tables           = { 'faces': faces }
+
+    if eyes:
+
+        # the eye boxes are given in image coordinates
+        rows = [ (idx, x + e_x, y + e_y, e_width, e_height)
+                 for idx, ((x, y, _, _), boxes) in enumerate(zip(faces, face_eyes))
+                 for (e_x, e_y, e_width, e_height) in boxes ]
+        tables['eyes'] = np.array(rows, dtype = np.int32).reshape(-1, 5)
+
+    return tables
+
+
+def processChunk(chunk, task, **options):
+    """ This function runs the detection on all frames of a chunk.
+
+    @param chunk   - (source, start, stop) @see createChunks
+    @param task    - detection task @see TASKS
+    @param options - detection options @see detectFrame
+    @return number of frames, dictionary of table name and numpy int32 array of rows
+    """
+    rows   = dict( (table, []) for table in getTables(task, options.get('eyes')) )
+    frames = 0
+
+    for index, gray in readChunk(chunk):
+
+        for table, values in detectFrame(gray, task, **options).items():
+            column = np.full( (len(values), 1), index, dtype = np.int32 )
+            rows[table].append(np.hstack((column, values)))
+
+        frames += 1
+
+    return frames, dict( (table, stackRows(table, values)) for table, values in rows.items() )
+
+
+def writeColumns(filename, tables, frames = None):
+    """ This function writes the tables column by column into a compressed numpy file.
+
+    @param filename - output file name
+    @param tables   - dictionary of table name and rows @see processChunk
+    @param frames   - dictionary of frame columns e.g. {'name': [...]} (default: None)
+    """
+    columns = {}
+
+    for table, rows in tables.items():
+        for idx, column in enumerate(COLUMNS[table]):
+            columns['%s.%s' % (table, column)] = rows[:, idx]
+
+    for column, values in (frames or {}).items():
+        columns['frames.%s' % column] = np.asarray(values)
+
+    # np.savez appends the extension unless it is given
+    with open(filename, 'wb') as output:
+        np.savez_compressed(output, **columns)
+
+
+def run(path, output, task = T_FACES, processes = 0, chunk_size = 64, cascades = '', **options):
+    """ This function runs the detection on a video file or an image directory and writes the
+        results to the output file.
+
+    @param path       - video file or image directory
+    @param output     - output file name; None skips writing
+    @param task       - detection task @see TASKS
+    @param processes  - number of worker processes; 0 uses all cores
+    @param chunk_size - number of consecutive frames per work item
+    @param cascades   - search path for cascade files
+    @param options    - detection options @see detectFrame
+    @return number of frames, dictionary of table name and rows
+    """
+    chunks, names, fps = createChunks(path, chunk_size)
+    processes          = processes or multiprocessing.cpu_count()
+
+    pool               = multiprocessing.Pool( processes,
+                                               _initWorker,
+                                               (task, options, cascades) )
+    try:
+        # the chunks are returned in order, so the rows stay sorted by frame
+        results = pool.map(_processWorker, chunks, chunksize = 1)
+    finally:
+        pool.terminate()
+        pool.join()
+
+    frames = sum(count for count, _ in results)
+    tables = dict( (table, stackRows(table, [ rows[table] for _, rows in results ]))
+                   for table in getTables(task, options.get('eyes')) )
+
+    if output:
+        if names is not None:
+            columns = { 'name': names }
+        else:
+            index   = np.arange(frames)
+            columns = { 'time': index / fps if fps else index.astype(float) }
+
+        writeColumns(output, tables, columns)
+
+    return frames, tables
+
+
+def createArgParser():
+    """ This method creates the argument parser of the batch engine.
+
+    @return Argument Parser object
+    """
+    parser = argparse.ArgumentParser(description='Run a SPY detection on recorded frames.')
+    parser.add_argument( 'input',
+                         help       = 'Video file or directory of images.')
+
+    parser.add_argument( 'output',
+                         help       = 'Output file for the result columns (.npz).')
+
+    parser.add_argument( '-t', '--task',
+                         dest       = 'task',
+                         choices    = TASKS,
+                         default    = T_FACES,
+                         help       = 'Detection: faces (OCFaceDetector) or markers (HCMarker).')
+
+    parser.add_argument( '-p', '--processes',
+                         dest       = 'processes',
+                         type       = type(0),
+                         default    = 0,
+                         help       = 'Number of worker processes; 0 uses all cores.')
+
+    parser.add_argument( '--chunk-size',
+                         dest       = 'chunk_size',
+                         type       = type(0),
+                         default    = 64,
+                         help       = 'Number of consecutive frames per work item.')
+
+    parser.add_argument( '-c', '--cascades',
+                         dest       = 'cascades',
+                         default    = '',
+                         help       = 'Search path for cascade files; overrides SPY_CASCADE_PATH.')
+
+    parser.add_argument( '-b', '--backend',
+                         dest       = 'backend',
+                         choices    = sorted(BACKENDS),
+                         default    = HaarDetector.NAME,
+                         help       = 'Face detector backend.')
+
+    parser.add_argument( '--dnn-model',
+                         dest       = 'dnn_model',
+                         default    = None,
+                         help       = 'Weights of the dnn backend.')
+
+    parser.add_argument( '--dnn-config',
+                         dest       = 'dnn_config',
+                         default    = None,
+                         help       = 'Network of the dnn backend.')
+
+    parser.add_argument( '-e', '--eyes',
+                         dest       = 'eyes',
+                         action     = 'store_true',
+                         help       = 'Detect the eyes within the faces as well.')
+
+    return parser.parse_args()
+
+
+def main(args):
+    """ This function runs the batch engine with the parsed command line arguments.
+
+    @param args - parsed arguments @see createArgParser
+    """
+    options = {}
+
+    if args.task == T_FACES:
+        if args.cascades:
+            CASCADES.setPaths(args.cascades)
+
+        options = { 'eyes':     args.eyes,
+                    'detector': createDetector( args.backend,
+                                                model  = args.dnn_model,
+                                                config = args.dnn_config ) }
+
+    start          = time.time()
+    frames, tables = run( args.input,
+                          args.output,
+                          args.task,
+                          args.processes,
+                          args.chunk_size,
+                          args.cascades,
+                          **options )
+    duration       = time.time() - start
+
+    print '%d frames in %.1f s (%.1f fps)' % (frames, duration, frames / max(duration, 1e-6))
+    for table, rows in sorted(tables.items()):
+        print '%-8s %d rows' % (table, len(rows))
+
+
+if __name__ == '__main__':
+    main(createArgParser())
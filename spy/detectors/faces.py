@@ -0,0 +1,373 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+""" Face detector backends.
+
+A backend finds face boxes in a grayscale image. All backends run on the CPU:
+
+    haar - the Haar cascade 'frontalface_default', the most accurate of the cascades
+    lbp  - the LBP cascade 'lbpcascade_frontalface', several times faster than the Haar cascade
+    dnn  - the OpenCV DNN face detector (res10 SSD), the most robust one; it needs the model files
+
+Example:
+
+    >>> detector = createDetector('lbp', scale_factor = 1.2)
+    >>> faces    = detector.detect(gray, min_size = (40, 40))
+
+The functions findFaces, detectEyes and detectFaces run a backend on a whole image and detect the
+eyes within the faces. They only need OpenCV and numpy and are shared by the OCFaceDetector module
+and the batch engine.
+
+The backends are picklable and keep no loaded model themselves. The cascades are shared by all
+instances through the CASCADES registry and the networks through DnnDetector.NETS, so a backend
+sent to a worker process loads its model once within that process.
+"""
+import os.path as op
+import threading
+
+try:
+    import cv2
+except ImportError:
+    print '[faces] Can not import cv2. The face detection will raise a RuntimeException.'
+
+import numpy as np
+
+from spy.utils.cascades import ENV_CASCADE_PATH, CascadeRegistry
+
+
+# cascades are loaded on first use and shared by all cascade backends
+CASCADES = CascadeRegistry()
+
+
+class FaceDetector(object):
+    """ The FaceDetector class is the base class of the face detector backends.
+
+    A backend declares its parameters in PARAMS, a dictionary mapping each parameter name to a
+    function converting a value given as string e.g. over RPC, and their default values in
+    DEFAULTS.
+    """
+    NAME     = ''
+    PARAMS   = {}
+    DEFAULTS = {}
+
+
+    def __init__(self, **params):
+        """ This method creates the backend with the given parameters. Unknown parameters are
+            ignored, missing ones or ones given as None take their default value.
+
+        @param params - backend parameters @see PARAMS
+        @raise ValueError if a parameter can not be converted or is out of range
+        """
+        for name, convert in self.PARAMS.items():
+            value = params.get(name)
+            value = self.DEFAULTS.get(name) if value is None else convert(value)
+            setattr(self, name, value)
+
+        self.checkParams()
+
+
+    def checkParams(self):
+        """ This method checks the parameters of the backend, so that invalid values are rejected
+            when the backend is created rather than on the first frame.
+
+        @raise ValueError if a parameter is out of range
+        """
+        pass
+
+
+    def getParams(self):
+        """ This method returns the parameters of the backend.
+
+        @return dictionary of parameter names and values
+        """
+        return dict( (name, getattr(self, name)) for name in sorted(self.PARAMS) )
+
+
+    def detect(self, gray, min_size = None, max_size = None):
+        """ This method detects faces in the image.
+
+        @param gray     - grayscale OpenCV image
+        @param min_size - (width, height) of the smallest face (default: None)
+        @param max_size - (width, height) of the largest face (default: None)
+        @return list of (x, y, width, height) face boxes
+        """
+        raise NotImplementedError()
+
+
+    def __repr__(self):
+        params = ', '.join( '%s = %r' % item for item in sorted(self.getParams().items()) )
+        return '%s(%s)' % (self.__class__.__name__, params)
+
+
+class CascadeDetector(FaceDetector):
+    """ The CascadeDetector class detects faces with an OpenCV cascade classifier. """
+    PARAMS   = { 'scale_factor':  float,
+                 'min_neighbors': int }
+    DEFAULTS = { 'scale_factor':  1.3,
+                 'min_neighbors': 5 }
+
+    # name of the cascade within the CASCADES registry
+    CASCADE  = ''
+
+
+    def checkParams(self):
+        if self.scale_factor <= 1.0:
+            raise ValueError('The scale_factor has to be greater than 1 [%s].' % self.scale_factor)
+
+        if self.min_neighbors < 0:
+            raise ValueError('The min_neighbors can not be negative [%s].' % self.min_neighbors)
+
+
+    def detect(self, gray, min_size = None, max_size = None):
+        return CASCADES[self.CASCADE].detectMultiScale( gray,
+                                                        self.scale_factor,
+                                                        self.min_neighbors,
+                                                        minSize = min_size or (0, 0),
+                                                        maxSize = max_size or (0, 0) )
+
+
+class HaarDetector(CascadeDetector):
+    """ The HaarDetector class detects faces with the Haar frontal face cascade. """
+    NAME    = 'haar'
+    CASCADE = 'frontalface_default'
+
+
+class LbpDetector(CascadeDetector):
+    """ The LbpDetector class detects faces with the LBP frontal face cascade. The cascade file is
+        part of the OpenCV sources but not of the opencv-python wheels.
+    """
+    NAME    = 'lbp'
+    CASCADE = 'lbpcascade_frontalface'
+
+
+class DnnDetector(FaceDetector):
+    """ The DnnDetector class detects faces with the OpenCV DNN face detector.
+
+    The model consists of the Caffe weights (res10_300x300_ssd_iter_140000.caffemodel) and the
+    network description (deploy.prototxt) of the OpenCV face detector sample. The grayscale image
+    is fed to the network as three equal channels.
+    """
+    NAME     = 'dnn'
+    PARAMS   = { 'model':      str,
+                 'config':     str,
+                 'confidence': float,
+                 'input_size': int }
+    DEFAULTS = { 'confidence': 0.5,
+                 'input_size': 300 }
+
+    # loaded networks shared by all instances of a process; keyed by (model, config)
+    NETS     = {}
+    LOCK     = threading.Lock()
+
+    # mean values of the BGR channels the network was trained with
+    MEAN     = (104.0, 177.0, 123.0)
+
+
+    def checkParams(self):
+        if not 0.0 <= self.confidence <= 1.0:
+            raise ValueError('The confidence has to be between 0 and 1 [%s].' % self.confidence)
+
+        if self.input_size <= 0:
+            raise ValueError('The input_size has to be positive [%s].' % self.input_size)
+
+        for filename in (self.model, self.config):
+            if not filename or not op.isfile(filename):
+                raise ValueError('DNN model file [%s] does not exist.' % filename)
+
+
+    def getNet(self):
+        """ This method returns the network of the backend and loads it on first use.
+
+        @return cv2.dnn.Net object
+        """
+        key = (self.model, self.config)
+        net = DnnDetector.NETS.get(key)
+
+        if net is None:
+            with DnnDetector.LOCK:
+                if key not in DnnDetector.NETS:
+                    DnnDetector.NETS[key] = cv2.dnn.readNet(self.model, self.config)
+                net = DnnDetector.NETS[key]
+
+        return net
+
+
+    def detect(self, gray, min_size = None, max_size = None):
+        height, width = gray.shape[:2]
+        size          = (self.input_size, self.input_size)
+        image         = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+        net           = self.getNet()
+        net.setInput(cv2.dnn.blobFromImage(image, 1.0, size, DnnDetector.MEAN))
+
+        # one row per detection: <image> <class> <confidence> <left> <top> <right> <bottom>
+        rows          = net.forward().reshape(-1, 7)
+        rows          = rows[rows[:, 2] >= self.confidence]
+
+        boxes         = np.clip(rows[:, 3:7], 0.0, 1.0) * [ width, height, width, height ]
+        boxes         = np.round(boxes).astype(int)
+        boxes[:, 2:] -= boxes[:, :2]
+
+        if min_size:
+            boxes = boxes[ (boxes[:, 2] >= min_size[0]) & (boxes[:, 3] >= min_size[1]) ]
+
+        if max_size:
+            boxes = boxes[ (boxes[:, 2] <= max_size[0]) & (boxes[:, 3] <= max_size[1]) ]
+
+        return boxes[ (boxes[:, 2] > 0) & (boxes[:, 3] > 0) ]
+
+
+# available backends by name
+BACKENDS = dict( (backend.NAME, backend) for backend in (HaarDetector, LbpDetector, DnnDetector) )
+
+
+# backend used if no detector is given to findFaces
+DETECTOR   = HaarDetector()
+
+# edge length of a face within the eye mosaic, the searched upper part of the face and the eye size
+# bounds relative to the face
+EYE_FACE   = 96
+EYE_REGION = 0.65
+EYE_MIN    = 0.1
+EYE_MAX    = 0.5
+
+
+def createDetector(name, **params):
+    """ This function creates the named face detector backend.
+
+    Parameters the backend does not use are ignored, so one set of parameters can serve all
+    backends.
+
+    @param name   - name of the backend @see BACKENDS
+    @param params - backend parameters @see FaceDetector.PARAMS
+    @return FaceDetector object
+    @raise ValueError if the backend is unknown, a parameter is invalid or a file is missing
+    """
+    if name not in BACKENDS:
+        raise ValueError('Unknown face detector backend [%s]; choose one of %s.'
+                         % (name, sorted(BACKENDS)))
+
+    backend = BACKENDS[name]
+
+    # a missing cascade would only fail on the first frame
+    if issubclass(backend, CascadeDetector) and backend.CASCADE not in CASCADES:
+        raise ValueError('No cascade [%s] for the %s backend in %s; add its directory with '
+                         '--cascades or %s.' % (backend.CASCADE, name, CASCADES.getPaths(),
+                                                ENV_CASCADE_PATH))
+
+    return backend(**params)
+
+
+def findFaces(gray, detector = None, detect_size = None, min_size = None, max_size = None):
+    """ This function detects faces in the whole image.
+
+    If \a detect_size is given the detection runs on a downscaled copy of the image that fits
+    into that size. The face boxes are scaled back to input coordinates.
+
+    @param gray        - grayscale OpenCV image
+    @param detector    - FaceDetector backend (default: None uses the Haar cascade)
+    @param detect_size - (width, height) of the detection resolution (default: None)
+    @param min_size    - (width, height) of the smallest face in input coordinates
+    @param max_size    - (width, height) of the largest face in input coordinates
+    @return list of face boxes
+    """
+    scale = 1.0
+
+    if detect_size:
+        height, width = gray.shape[:2]
+        scale         = min(1.0, float(detect_size[0]) / width, float(detect_size[1]) / height)
+
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx = scale, fy = scale, interpolation = cv2.INTER_AREA)
+
+    _size    = lambda size: (int(size[0] * scale), int(size[1] * scale)) if size else None
+
+    detector = detector or DETECTOR
+    faces    = detector.detect(gray, min_size = _size(min_size), max_size = _size(max_size))
+
+    if scale < 1.0 and len(faces) > 0:
+        faces = np.round(np.asarray(faces) / scale).astype(int)
+
+    return faces
+
+
+def detectFaces(gray, eyes = True, **options):
+    """ This function detects faces and the eyes within each face.
+
+    @param gray    - grayscale OpenCV image
+    @param eyes    - boolean specifying whether to detect the eyes (default: True)
+    @param options - detection options @see findFaces
+    @return faces, eyes - list of face boxes and a list of eye boxes for each face; eyes is
+                          None if they were not detected
+    """
+    faces = findFaces(gray, **options)
+    return faces, detectEyes(gray, faces) if eyes else None
+
+
+def detectEyes(gray, faces):
+    """ This function detects the eyes within each face.
+
+    All faces are scaled to EYE_FACE x EYE_FACE pixels. Their upper EYE_REGION part, where the
+    eyes are, is tiled into one mosaic which is searched by a single run of the eye cascade.
+    The eye size is bounded by EYE_MIN and EYE_MAX of the face size, so only a few scales are
+    searched. A hit belongs to the tile containing it completely, hits spanning two tiles are
+    dropped.
+
+    @param gray  - grayscale OpenCV image
+    @param faces - list of face boxes
+    @return list of eye boxes for each face; the boxes are relative to the face box
+    """
+    count  = len(faces)
+    if count == 0:
+        return []
+
+    size   = EYE_FACE
+    region = int(size * EYE_REGION)
+    cols   = int(np.ceil(np.sqrt(count)))
+    rows   = (count + cols - 1) // cols
+    mosaic = np.zeros((rows * region, cols * size), dtype = np.uint8)
+
+    for idx, (x, y, width, height) in enumerate(faces):
+        top, left = divmod(idx, cols)
+        face      = cv2.resize( gray[y:y + height, x:x + width],
+                                (size, size),
+                                interpolation = cv2.INTER_AREA )
+        mosaic[top * region:(top + 1) * region, left * size:(left + 1) * size] = face[:region]
+
+    eye_min = int(size * EYE_MIN)
+    eye_max = int(size * EYE_MAX)
+    hits    = CASCADES['eye'].detectMultiScale( mosaic,
+                                                minSize = (eye_min, eye_min),
+                                                maxSize = (eye_max, eye_max) )
+    hits    = np.asarray(hits, dtype = int).reshape(-1, 4)
+
+    # tile of each hit; the top left corner of a hit lies within its tile
+    tile    = np.array([ size, region ])
+    corner  = hits[:, :2] // tile
+    tiles   = corner[:, 1] * cols + corner[:, 0]
+    inside  = np.all(hits[:, :2] + hits[:, 2:] <= (corner + 1) * tile, axis = 1)
+    keep    = inside & (tiles < count)
+
+    hits    = hits[keep]
+    tiles   = tiles[keep]
+    hits[:, :2] -= corner[keep] * tile
+
+    # scale the hits from the mosaic tile back to the face box
+    scale   = np.asarray(faces, dtype = float).reshape(-1, 4)[tiles][:, [2, 3, 2, 3]] / size
+    eyes    = np.round(hits * scale).astype(int)
+
+    return [ eyes[tiles == idx] for idx in range(count) ]
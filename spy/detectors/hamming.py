@@ -0,0 +1,321 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+""" Hamming marker detector.
+
+The detector reads the markers of the hamming detector of the python-ar-markers package by
+DebVortex, but handles all candidates of a frame at once:
+
+1. The contours of the edge image are approximated by polygons. This is the only per candidate
+   loop, it consists of OpenCV calls.
+2. The quadrilaterals are filtered for convexity, size and orientation as arrays.
+3. The homographies of all candidates are solved in one batch and the 7x7 cells of all candidates
+   are sampled with one gather from the grayscale image. Candidates with a bright border are
+   rejected on the cell centers before the full sampling.
+4. The cells are validated and the three Hamming(7,4) blocks are decoded with a lookup table.
+   A block that is no code word, i.e. has a nonzero syndrome, rejects the candidate as the parity
+   check of ar_markers does.
+
+A marker consists of 7x7 cells: a black border, one white orientation cell in a corner of the
+inner 5x5 cells and 21 code bits holding the 12 bit id as three Hamming(7,4) code words.
+
+The marker layout, the cell size, the thresholds and the code check are those of ar_markers. The
+pixels of a cell are read at the nearest image pixel of each canonical point, where ar_markers warps
+the candidate with the bilinear interpolation of cv2.warpPerspective. Cells close to the threshold,
+e.g. of small or blurred markers, can therefore binarize differently.
+
+Both detectors are not checked for equal results; benchmarks/bench_hamming.py reports the share of
+frames with the same ids if ar_markers is installed.
+"""
+try:
+    import cv2
+except ImportError:
+    print '[hamming] Can not import cv2. The detector will raise a RuntimeException.'
+
+import numpy as np
+
+from spy.models.marker import MarkerRecord
+
+
+MARKER_SIZE = 7
+
+# pixels per cell side of the canonical marker image, as the warped image of ar_markers
+CELL_SIZE   = 7
+WARPED_SIZE = MARKER_SIZE * CELL_SIZE
+
+# Hamming(7,4) code; a code word is <p1> <p2> <d1> <p3> <d2> <d3> <d4>
+GENERATOR_MATRIX   = np.array([ [1, 1, 0, 1],
+                                [1, 0, 1, 1],
+                                [1, 0, 0, 0],
+                                [0, 1, 1, 1],
+                                [0, 1, 0, 0],
+                                [0, 0, 1, 0],
+                                [0, 0, 0, 1] ])
+DATA_POSITIONS     = [ 2, 4, 5, 6 ]
+
+CODE_POSITIONS     = [ [1, 2], [1, 3], [1, 4],
+                       [2, 1], [2, 2], [2, 3], [2, 4], [2, 5],
+                       [3, 1], [3, 2], [3, 3], [3, 4], [3, 5],
+                       [4, 1], [4, 2], [4, 3], [4, 4], [4, 5],
+                       [5, 2], [5, 3], [5, 4] ]
+
+# orientation cells in the order of the rotation they require
+ORIENTATION_POSITIONS = [ [1, 1], [1, 5], [5, 5], [5, 1] ]
+
+
+def _createTables():
+    """ This function creates the index tables of the cells and the Hamming decoding table. """
+    grid        = np.arange(MARKER_SIZE * MARKER_SIZE).reshape(MARKER_SIZE, MARKER_SIZE)
+
+    border      = np.ones( (MARKER_SIZE, MARKER_SIZE), dtype = bool )
+    border[1:-1, 1:-1] = False
+
+    orientation = [ grid[row, col] for row, col in ORIENTATION_POSITIONS ]
+
+    # cell index of each code bit for the four rotations of the marker
+    code        = np.array([ [ np.rot90(grid, k)[row, col] for row, col in CODE_POSITIONS ]
+                             for k in range(4) ])
+
+    # the 16 code words decode to their data, the words with a nonzero syndrome to -1
+    decode      = np.full(128, -1, dtype = np.int32)
+
+    for data in range(16):
+        bits = [ (data >> shift) & 1 for shift in (3, 2, 1, 0) ]
+        word = GENERATOR_MATRIX.dot(bits) % 2
+        decode[ int(''.join(map(str, word)), 2) ] = data
+
+    return grid[border], np.array(orientation), code, decode
+
+
+BORDER_CELLS, ORIENTATION_CELLS, CODE_CELLS, DECODE_TABLE = _createTables()
+
+# canonical corners, the same as the warped image of ar_markers
+CANONICAL   = np.array([ [0, 0], [WARPED_SIZE - 1, 0],
+                         [WARPED_SIZE - 1, WARPED_SIZE - 1], [0, WARPED_SIZE - 1] ],
+                       dtype = np.float64)
+
+
+def _createSamples():
+    """ This function returns the canonical (x, y) coordinates of all pixels grouped by cell and
+        the coordinates of the cell centers.
+    """
+    cell_y,   cell_x   = np.indices( (MARKER_SIZE, MARKER_SIZE) )
+    offset_y, offset_x = np.indices( (CELL_SIZE, CELL_SIZE) )
+
+    cell_x   = cell_x.reshape(-1, 1) * CELL_SIZE
+    cell_y   = cell_y.reshape(-1, 1) * CELL_SIZE
+
+    samples  = np.stack([ cell_x + offset_x.reshape(1, -1),
+                          cell_y + offset_y.reshape(1, -1) ], axis = -1)
+    centers  = np.concatenate([ cell_x, cell_y ], axis = 1) + CELL_SIZE // 2
+
+    return samples.reshape(-1, 2).astype(np.float64), centers.astype(np.float64)
+
+
+SAMPLES, CENTERS = _createSamples()
+
+
+def detectMarkers(image, gray = None, edges = None, dx = None, dy = None):
+    """ This function detects the Hamming markers in an image.
+
+    @param image - image array in the RGB channel order of yarp
+    @param gray  - optional grayscale version of the image
+    @param edges - optional uint8 buffer of the image size for the edge image @see findCandidates
+    @param dx    - optional int16 buffer of the image size for the x gradient @see findCandidates
+    @param dy    - optional int16 buffer of the image size for the y gradient @see findCandidates
+    @return list of MarkerRecord; a marker may be found more than once
+    """
+    if gray is None:
+        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+
+    quads = findCandidates(gray, edges, dx, dy)
+
+    if not len(quads):
+        return []
+
+    ids, valid = decodeCells(sampleCells(gray, quads))
+
+    return [ MarkerRecord(mid, quad) for mid, quad in zip(ids[valid], quads[valid]) ]
+
+
+def findCandidates(gray, edges = None, dx = None, dy = None):
+    """ This function returns the convex quadrilaterals of the edge image that can hold a marker.
+
+    The gradients are computed as Canny does internally, but into the given buffers, so that a
+    caller passing all buffers has no frame sized allocations within Canny but its edge map.
+
+    @param gray  - grayscale image
+    @param edges - optional uint8 buffer of the size of gray the edge image is written into;
+                   otherwise it is allocated for each call
+    @param dx    - optional int16 buffer of the size of gray for the x gradient
+    @param dy    - optional int16 buffer of the size of gray for the y gradient
+    @return numpy (n, 4, 2) int32 array of corners in the order of the polygon approximation
+    """
+    height, width = gray.shape[:2]
+
+    dx            = cv2.Sobel( gray, cv2.CV_16S, 1, 0, dst = dx, ksize = 3,
+                               borderType = cv2.BORDER_REPLICATE )
+    dy            = cv2.Sobel( gray, cv2.CV_16S, 0, 1, dst = dy, ksize = 3,
+                               borderType = cv2.BORDER_REPLICATE )
+    edge_image    = cv2.Canny(dx, dy, 10, 100, edges = edges)
+    contours      = cv2.findContours(edge_image, cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE)[-2]
+
+    # only long enough contours that can be approximated by four points
+    min_length    = min(width, height) / 50
+    quads         = [ approx for approx in
+                      ( cv2.approxPolyDP(contour, len(contour) * 0.01, True)
+                        for contour in contours if len(contour) > min_length )
+                      if len(approx) == 4 ]
+
+    if not quads:
+        return np.zeros( (0, 4, 2), dtype = np.int32 )
+
+    quads         = np.array(quads, dtype = np.int32).reshape(-1, 4, 2)
+
+    # convex: the cross products of all consecutive edges have the same sign
+    corners       = quads.astype(np.float64)
+    edges         = np.roll(corners, -1, axis = 1) - corners
+    cross         = ( edges[:, :, 0] * np.roll(edges[:, :, 1], -1, axis = 1) -
+                      edges[:, :, 1] * np.roll(edges[:, :, 0], -1, axis = 1) )
+    convex        = (cross > 0).all(axis = 1) | (cross < 0).all(axis = 1)
+
+    # each cell needs at least one pixel
+    area          = np.abs(cross.sum(axis = 1)) / 2.0
+
+    return quads[convex & (area >= MARKER_SIZE * MARKER_SIZE)]
+
+
+def getHomographies(quads):
+    """ This function solves the homographies from the canonical marker to all candidates at once.
+        The corners are ordered as the convex hull of ar_markers, so the cells are not mirrored.
+
+    @param quads - numpy (n, 4, 2) array of convex quadrilaterals
+    @return numpy (n, 3, 3) array
+    """
+    corners = quads.astype(np.float64)
+
+    # counter-clockwise in a y-up coordinate system, i.e. a positive shoelace sum
+    area    = ( corners[:, :, 0] * np.roll(corners[:, :, 1], -1, axis = 1) -
+                np.roll(corners[:, :, 0], -1, axis = 1) * corners[:, :, 1] ).sum(axis = 1)
+    corners[area < 0] = corners[area < 0, ::-1]
+
+    count   = len(corners)
+    x, y    = corners[:, :, 0], corners[:, :, 1]
+    u, v    = CANONICAL[:, 0], CANONICAL[:, 1]
+
+    # two equations per corner for the eight unknowns of the homography
+    system  = np.zeros( (count, 8, 8) )
+    system[:, 0::2, 0] = u
+    system[:, 0::2, 1] = v
+    system[:, 0::2, 2] = 1.0
+    system[:, 0::2, 6] = -x * u
+    system[:, 0::2, 7] = -x * v
+    system[:, 1::2, 3] = u
+    system[:, 1::2, 4] = v
+    system[:, 1::2, 5] = 1.0
+    system[:, 1::2, 6] = -y * u
+    system[:, 1::2, 7] = -y * v
+
+    result  = np.stack([ x, y ], axis = -1).reshape(count, 8, 1)
+    values  = np.linalg.solve(system, result).reshape(count, 8)
+
+    return np.concatenate([ values, np.ones( (count, 1) ) ], axis = 1).reshape(count, 3, 3)
+
+
+def samplePixels(gray, homographies, points):
+    """ This function maps canonical points into the image and reads the nearest pixels.
+
+    @param gray         - grayscale image
+    @param homographies - numpy (n, 3, 3) array
+    @param points       - numpy (m, 2) array of canonical points
+    @return numpy (n, m) array of gray values
+    """
+    height, width = gray.shape[:2]
+
+    mapped = np.einsum('nij,mj->nmi', homographies[:, :, :2], points) + homographies[:, None, :, 2]
+    mapped = mapped[:, :, :2] / mapped[:, :, 2:]
+
+    cols   = np.clip(np.rint(mapped[:, :, 0]), 0, width  - 1).astype(np.intp)
+    rows   = np.clip(np.rint(mapped[:, :, 1]), 0, height - 1).astype(np.intp)
+
+    return gray[rows, cols]
+
+
+def sampleCells(gray, quads):
+    """ This function binarizes the 7x7 cells of all candidates with the thresholds of ar_markers:
+        a cell is white if the mean of its thresholded pixels is at least 127.
+
+    @param gray  - grayscale image
+    @param quads - numpy (n, 4, 2) array of candidates
+    @return numpy (n, 49) bool array; candidates with a bright border cell center are all white
+    """
+    homographies = getHomographies(quads)
+    cells        = np.ones( (len(quads), MARKER_SIZE * MARKER_SIZE), dtype = bool )
+
+    # the border has to be black, most candidates already fail on the cell centers
+    centers      = samplePixels(gray, homographies, CENTERS) > 127
+    dark         = ~centers[:, BORDER_CELLS].any(axis = 1)
+
+    if dark.any():
+        white       = samplePixels(gray, homographies[dark], SAMPLES) > 127
+        white       = white.reshape(-1, MARKER_SIZE * MARKER_SIZE, CELL_SIZE * CELL_SIZE)
+        cells[dark] = white.mean(axis = 2) * 255 >= 127
+
+    return cells
+
+
+def decodeCells(cells):
+    """ This function validates the cells and decodes the marker ids.
+
+    @param cells - numpy (n, 49) bool array
+    @return numpy (n,) array of ids, numpy (n,) bool array of valid markers
+    """
+    count       = len(cells)
+
+    # black border, exactly one white orientation cell and three code words
+    orientation = cells[:, ORIENTATION_CELLS]
+    valid       = ~cells[:, BORDER_CELLS].any(axis = 1) & (orientation.sum(axis = 1) == 1)
+
+    # turn the cells so that the orientation cell is top left and read the code words
+    rotation    = orientation.argmax(axis = 1)
+    bits        = cells[np.arange(count)[:, None], CODE_CELLS[rotation]].astype(np.int32)
+    words       = bits.reshape(count, 3, 7).dot(1 << np.arange(6, -1, -1))
+    data        = DECODE_TABLE[words]
+    valid      &= (data >= 0).all(axis = 1)
+
+    return (data[:, 0] << 8) | (data[:, 1] << 4) | data[:, 2], valid
+
+
+def generateMarker(mid, cell_size = 10):
+    """ This function renders a marker image, e.g. for printing or tests.
+
+    @param mid       - marker id between 0 and 4095
+    @param cell_size - pixels per cell side
+    @return numpy uint8 array of (7 * cell_size, 7 * cell_size) pixels
+    """
+    cells = np.zeros( (MARKER_SIZE, MARKER_SIZE), dtype = np.uint8 )
+    cells[ORIENTATION_POSITIONS[0][0], ORIENTATION_POSITIONS[0][1]] = 255
+
+    bits  = []
+    for shift in (8, 4, 0):
+        data  = [ (mid >> (shift + bit)) & 1 for bit in (3, 2, 1, 0) ]
+        bits += (GENERATOR_MATRIX.dot(data) % 2).tolist()
+
+    for (row, col), bit in zip(CODE_POSITIONS, bits):
+        cells[row, col] = 255 * bit
+
+    return np.kron(cells, np.ones( (cell_size, cell_size), dtype = np.uint8 ))
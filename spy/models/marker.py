@@ -0,0 +1,74 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+import numpy as np
+
+
+class MarkerRecord(object):
+    """ The MarkerRecord class provides a compact record of a detected Hamming marker. It offers the
+        id, center and contours attributes and the highlite_marker method of the HammingMarker of
+        the ar_markers package, but keeps no reference to the detection data.
+
+        The contours are stored as (4, 1, 2) int32 array and the center is computed once.
+    """
+
+    __slots__ = ( 'id', 'center', 'contours' )
+
+
+    def __init__(self, mid, contours):
+        """ This method creates the record.
+
+        @param mid      - marker id
+        @param contours - the four corner points of the marker e.g. (4, 1, 2) array
+        """
+        self.id       = int(mid)
+        self.contours = np.asarray(contours, dtype = np.int32).reshape(4, 1, 2)
+        center        = self.contours.mean(axis = 0).flatten()
+        self.center   = ( int(center[0]), int(center[1]) )
+
+
+    @staticmethod
+    def fromMarker(marker):
+        """ This method creates a record from a HammingMarker or another record.
+
+        @param marker - HammingMarker from ar_markers package
+        @return MarkerRecord
+        """
+        if isinstance(marker, MarkerRecord):
+            return marker
+
+        return MarkerRecord(marker.id, marker.contours)
+
+
+    def highlite_marker(self, img, contour_color = (0, 255, 0), text_color = (255, 0, 0),
+                        linewidth = 5):
+        """ This method draws the contour and the id of the marker into the image in the same way as
+            the HammingMarker does.
+
+        @param img           - image array
+        @param contour_color - color of the contour
+        @param text_color    - color of the id
+        @param linewidth     - line width of the contour
+        """
+        import cv2
+
+        cv2.drawContours(img, [ self.contours ], -1, contour_color, linewidth)
+        cv2.putText(img, str(self.id), self.center, cv2.FONT_HERSHEY_SIMPLEX, 2, text_color)
+
+
+    def __repr__(self):
+        return 'MarkerRecord(%d, %s)' % (self.id, self.contours.reshape(4, 2).tolist())
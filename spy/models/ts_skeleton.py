@@ -19,7 +19,20 @@ import numpy as np
 
 
 class TSSkeleton(object):
-    """ The TSSkeleton class provides a skeleton for the tutor spotter module. """
+    """ The TSSkeleton class provides a skeleton for the tutor spotter module.
+
+        The joints are stored in preallocated numpy arrays, one row per joint:
+
+        positions       - (15, 4) x, y, z and position confidence
+        quaternions     - (15, 4) orientation quaternion
+        ori_confidences - (15,)   orientation confidence
+
+        The (15, 3, 3) rotation matrices are computed on first access, only for the requested
+        joints. Call resetRotations() after writing into the quaternions array directly.
+    """
+
+    __slots__ = ( 'uid', 'create_time', 'positions', 'quaternions', 'ori_confidences',
+                  '_rotations', '_rotated' )
 
 
     JOINT_LABELS = [ 'head',            'neck',
@@ -50,22 +63,48 @@ class TSSkeleton(object):
     L_FOOT      = 13
     R_FOOT      = 14
 
-    # ORI_RM - Orientation Rotation Matrix
+    JOINTS      = 15
+
 
     def __init__(self, userid, data_dict = None, create_time = None):
+        """ This method creates the skeleton.
+
+        @param userid      - user id or a dictionary as given by __repr__
+        @param data_dict   - optional per joint dictionaries with 'POS' and 'ORI' lists
+        @param create_time - optional creation time
+        """
 
         # overloaded constructor
         if isinstance(userid, dict):
-            self.uid          = userid['uid']
-            self.data         = userid['data']
-            self.create_time  = userid['create_time']
-        else:
-            self.uid          = userid
-            self.data         = data_dict
-            self.create_time  = create_time
+            data_dict   = userid['data']
+            create_time = userid['create_time']
+            userid      = userid['uid']
+
+        self.uid              = userid
+        self.create_time      = create_time
+
+        self.positions        = np.zeros( (TSSkeleton.JOINTS, 4) )
+        self.quaternions      = np.zeros( (TSSkeleton.JOINTS, 4) )
+        self.ori_confidences  = np.zeros( TSSkeleton.JOINTS )
+        self._rotations       = np.empty( (TSSkeleton.JOINTS, 3, 3) )
+        self._rotated         = np.zeros( TSSkeleton.JOINTS, dtype = bool )
+
+        if data_dict:
+            for idx in range(len(data_dict)):
+                self.setJoint(idx, data_dict[idx]['POS'], data_dict[idx]['ORI'])
 
-        for i in range(len(self.data)):
-            self.data[i]['ORI_RM'] = TSSkeleton.quaternionToRotationMatrix(self.data[i]['ORI'])
+
+    def setJoint(self, joint, position, orientation):
+        """ This method sets the position and orientation of the specified joint.
+
+        @param joint       - the selected joint @see joint constants.
+        @param position    - x, y, z and confidence
+        @param orientation - quaternion and confidence
+        """
+        self.positions[joint]       = position
+        self.quaternions[joint]     = orientation[:4]
+        self.ori_confidences[joint] = orientation[4] if len(orientation) > 4 else 0.0
+        self._rotated[joint]        = False
 
 
     def getJoint(self, joint):
@@ -74,12 +113,124 @@ class TSSkeleton(object):
         @param joint - the selected joint @see joint constants.
         @type  joint - integer
         """
-        return self.data[joint]['POS'] + self.data[joint]['ORI']
+        return ( self.positions[joint].tolist() + self.quaternions[joint].tolist() +
+                 [ self.ori_confidences[joint] ] )
+
+
+    def getRotationMatrices(self, joints = None):
+        """ This method returns the rotation matrices. Only the matrices of the selected joints are
+            computed, the rows of the other joints may be undefined.
+
+        @param joints - optional list of joints, defaults to all joints
+        @return numpy (15, 3, 3) array
+        """
+        if joints is None:
+            missing = np.flatnonzero(~self._rotated)
+        else:
+            missing = [ joint for joint in joints if not self._rotated[joint] ]
+
+        if len(missing):
+            self._rotations[missing] = TSSkeleton.quaternionsToRotationMatrices(
+                                                                    self.quaternions[missing])
+            self._rotated[missing] = True
+
+        return self._rotations
+
+
+    def getRotationMatrix(self, joint):
+        """ This method returns the rotation matrix of the specified joint.
+
+        @param joint - the selected joint @see joint constants.
+        @return numpy 3x3 array
+        """
+        return self.getRotationMatrices([ joint ])[joint]
+
+
+    def resetRotations(self):
+        """ This method discards the cached rotation matrices. """
+        self._rotated[:] = False
+
+
+    @staticmethod
+    def computeRotationMatrices(skeletons, joints = None):
+        """ This method computes the rotation matrices of several skeletons in one vectorized call,
+            e.g. for all users of a frame.
+
+        @param skeletons - list of TSSkeleton
+        @param joints    - optional list of joints, defaults to all joints
+        """
+        if not skeletons:
+            return
+
+        joints   = range(TSSkeleton.JOINTS) if joints is None else list(joints)
+        quats    = np.concatenate([ skeleton.quaternions[joints] for skeleton in skeletons ])
+        matrices = TSSkeleton.quaternionsToRotationMatrices(quats)
+        matrices = matrices.reshape( (len(skeletons), len(joints), 3, 3) )
+
+        for skeleton, matrix in zip(skeletons, matrices):
+            skeleton._rotations[joints] = matrix
+            skeleton._rotated[joints]   = True
+
+
+    @staticmethod
+    def quaternionsToRotationMatrices(quats, matrices = None):
+        """Convert several quaternions into rotation matrix form. This is the vectorized version of
+        quaternionToRotationMatrix.
+
+        @param quats    - The quaternions.
+        @type  quats    - numpy (N, 4) array
+        @param matrices - Optional output array.
+        @type  matrices - numpy (N, 3, 3) array
+        @return numpy (N, 3, 3) array
+        """
+        quats = np.asarray(quats, dtype = np.float64)
+
+        if matrices is None:
+            matrices = np.empty( (len(quats), 3, 3) )
+
+        q1, q2, q3, q4 = quats[:, 0], quats[:, 1], quats[:, 2], quats[:, 3]
+
+        # Repetitive calculations.
+        q4_2 = q4 * q4
+        q12 = q1 * q2
+        q13 = q1 * q3
+        q14 = q1 * q4
+        q23 = q2 * q3
+        q24 = q2 * q4
+        q34 = q3 * q4
+
+        # The diagonal.
+        matrices[:, 0, 0] = 2.0 * (q1 * q1 + q4_2) - 1.0
+        matrices[:, 1, 1] = 2.0 * (q2 * q2 + q4_2) - 1.0
+        matrices[:, 2, 2] = 2.0 * (q3 * q3 + q4_2) - 1.0
+
+        # Off-diagonal.
+        matrices[:, 0, 1] = 2.0 * (q12 - q34)
+        matrices[:, 0, 2] = 2.0 * (q13 + q24)
+        matrices[:, 1, 2] = 2.0 * (q23 - q14)
+
+        matrices[:, 1, 0] = 2.0 * (q12 + q34)
+        matrices[:, 2, 0] = 2.0 * (q13 - q24)
+        matrices[:, 2, 1] = 2.0 * (q23 + q14)
+        return matrices
+
+
+    @property
+    def data(self):
+        """ The joints in the former list of dictionaries layout with 'POS', 'ORI' and 'ORI_RM'.
+            The lists are built on each access, use the arrays in time critical code.
+        """
+        rotations = self.getRotationMatrices()
+
+        return [ { 'POS':    self.positions[idx].tolist(),
+                   'ORI':    self.quaternions[idx].tolist() + [ self.ori_confidences[idx] ],
+                   'ORI_RM': rotations[idx].copy() } for idx in range(TSSkeleton.JOINTS) ]
 
 
     @staticmethod
     def quaternionToRotationMatrix(quat):
-        """Convert a quaternion into rotation matrix form.
+        """Convert a quaternion into rotation matrix form. This is the reference implementation of
+        quaternionsToRotationMatrices.
 
         @param quat    - The quaternion.
         @type  quat    - numpy 4D, rank-1 array
@@ -115,9 +266,9 @@ class TSSkeleton(object):
 
     def __str__(self):
         txt = ['User %s' % self.uid]
-        for idx in range(len(self.data)):
-            pos = ', '.join([ '%.2f' % pos for pos in self.data[idx]['POS'] ])
-            ori = ', '.join([ '%s' % ori for ori in self.data[idx]['ORI'] ])
+        for idx in range(TSSkeleton.JOINTS):
+            pos = ', '.join([ '%.2f' % pos for pos in self.positions[idx] ])
+            ori = ', '.join([ '%s' % ori for ori in self.getJoint(idx)[4:] ])
             txt.append( '%s: position[%s], orientation[%s]' % ( TSSkeleton.JOINT_LABELS[idx],
                                                                 pos,
                                                                 ori ) )
@@ -126,9 +277,10 @@ class TSSkeleton(object):
 
     def __repr__(self):
         data = {}
-        for idx in range(len(self.data)):
+        for idx in range(TSSkeleton.JOINTS):
+            joint = self.getJoint(idx)
             data[idx] = {}
-            data[idx]['POS'] = self.data[idx]['POS']
-            data[idx]['ORI'] = self.data[idx]['ORI']
+            data[idx]['POS'] = joint[:4]
+            data[idx]['ORI'] = joint[4:]
 
         return str( {'uid': self.uid, 'create_time' : self.create_time, 'data': data} )
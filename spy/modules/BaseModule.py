@@ -16,21 +16,58 @@
 #    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
 ####################################################################################################
 import argparse
+import collections
+import threading
 import time
 import yarp
 
 from spy.utils.factory import YarpFactory
+from spy.utils.motion  import MotionGate
+from spy.utils.stats   import StageStats, NULL_STATS
 
 EMSG_YARP_NOT_FOUND  = "Could not connect to the yarp server. Try running 'yarp detect'."
 
+# scheduling policies @see BaseModule.updateModule
+S_PERIODIC           = 'periodic'
+S_EVENT              = 'event'
+SCHEDULES            = [ S_PERIODIC, S_EVENT ]
+
 
 class BaseModule(yarp.RFModule, YarpFactory):
+    """ The BaseModule class provides the common parts of the SPY modules such as the RPC port,
+        the instrumentation and the scheduling.
+
+        Subclasses implement process() which waits for the next input and handles it. The
+        scheduling policy decides how process() is called:
+            'periodic' - the RFModule calls it every getPeriod() seconds
+            'event'    - a dedicated thread calls it again as soon as it returned, so each input
+                         is handled when it arrives. The RFModule thread only keeps the module
+                         alive.
+    """
+
+    # period of the RFModule thread in event mode; it only checks whether the module is alive
+    EVENT_PERIOD = 1.0
 
 
     def __init__(self, args):
         yarp.RFModule.__init__(self)
-        self.prefix = args.name
-        self._ports = []
+        self.prefix  = args.name
+        self._ports  = []
+
+        # scheduling settings @see updateModule
+        self.schedule      = getattr(args, 'schedule', S_PERIODIC)
+        self.period        = 0.1
+        self._event_thread = None
+        self._stop_event   = threading.Event()
+
+        # instrumentation settings @see timeStage
+        self.stats_enabled = not getattr(args, 'no_stats', False)
+        self.stats_period  = getattr(args, 'stats_period', 0.0)
+        self._stages       = collections.OrderedDict()
+
+        # change detection in front of the image processing @see hasMotion
+        self.motion        = MotionGate( getattr(args, 'motion_threshold', 0.0),
+                                         getattr(args, 'motion_refresh',   5.0) )
 
 
     def configure(self, rf):
@@ -52,36 +89,300 @@ class BaseModule(yarp.RFModule, YarpFactory):
 
         self.attach_rpc_server(self.rpc_port)
         self._ports.append(self.rpc_port)
+
+        # periodic statistics output
+        if self.stats_enabled and self.stats_period > 0:
+            self.statsPort = self.createOutputPort('stats')
+            stats_thread   = threading.Thread(target = self._publishStats)
+            stats_thread.daemon = True
+            stats_thread.start()
+
         return True
 
 
     def interruptModule(self):
+        self._stop_event.set()
         for port in reversed(self._ports):
             port.interrupt()
         return True
 
 
     def close(self):
+
+        # the interrupted ports let process() return so the event thread can finish
+        if self._event_thread:
+            self._event_thread.join(BaseModule.EVENT_PERIOD)
+
         for port in reversed(self._ports):
             port.close()
         return True
 
 
     def getPeriod(self):
-        return 0.1
+
+        if self.schedule == S_EVENT:
+            return BaseModule.EVENT_PERIOD
+
+        return self.period
 
 
     def updateModule(self):
+
+        if self.schedule == S_EVENT:
+
+            # the event thread is started on the first update as all ports exist by then
+            if self._event_thread is None:
+                self._event_thread        = threading.Thread(target = self._runEvents)
+                self._event_thread.daemon = True
+                self._event_thread.start()
+
+            return self._event_thread.is_alive()
+
+        return self.process()
+
+
+    def process(self):
+        """ This method waits for the next input and handles it. Subclasses overwrite it.
+
+        @return False to stop the module
+        """
         # XXX: I do not know why we need that, but if method is empty the module gets stuck
         time.sleep(0.000001)
         return True
 
 
+    def _runEvents(self):
+        """ This method calls process() until the module gets interrupted. """
+
+        while not self._stop_event.is_set():
+            if not self.process():
+                break
+
+
+    def respond(self, command, reply):
+
+        if command.get(0).asString() == 'stats':
+
+            if command.get(1).asString() == 'reset':
+                for stage in self._stages.values():
+                    stage.reset()
+                reply.addString('ack')
+
+            else:
+                self.fillStats(reply)
+
+            return True
+
+        if command.get(0).asString() == 'drops':
+
+            # one list per buffered image port: <port name> <frames> <dropped frames>
+            for port in self._ports:
+                if hasattr(port, 'dropped'):
+                    values = reply.addList()
+                    values.addString(port.getName())
+                    values.addInt(port.frames)
+                    values.addInt(port.dropped)
+
+            return True
+
+        if command.get(0).asString() == 'motion':
+
+            # motion <threshold> [<refresh>] sets the gate, motion alone reports it:
+            # <threshold> <refresh> <checked frames> <skipped frames>
+            if command.size() > 1:
+                self.motion.threshold = command.get(1).asDouble()
+
+                if command.size() > 2:
+                    self.motion.refresh = command.get(2).asDouble()
+
+                reply.addString('ack')
+
+            else:
+                reply.addDouble(self.motion.threshold)
+                reply.addDouble(self.motion.refresh)
+                reply.addInt(self.motion.checked)
+                reply.addInt(self.motion.skipped)
+
+            return True
+
+        reply.addString('nack')
+        return True
+
+
+    ################################################################################################
+    #
+    # Instrumentation
+    #
+    ################################################################################################
+    def getStage(self, name):
+        """ This method returns the counters of the named stage and creates them if needed.
+
+        @param name - name of the stage
+        @return StageStats object
+        """
+        stage = self._stages.get(name)
+
+        if stage is None:
+            stage = self._stages[name] = StageStats(name)
+
+        return stage
+
+
+    def timeStage(self, name):
+        """ This method returns a context manager that times the enclosed block as one run of the
+            named stage. If the instrumentation is disabled the context manager does nothing.
+
+        Example:
+
+            >>> with self.timeStage('detect'):
+            >>>     markers = detect_markers(image)
+
+        @param name - name of the stage
+        @return StageStats or NullStats object
+        """
+        if not self.stats_enabled:
+            return NULL_STATS
+
+        return self.getStage(name)
+
+
+    def addStage(self, name, duration):
+        """ This method adds a run of the named stage that was timed without timeStage, e.g. a
+            detection that ran in a worker process.
+
+        @param name     - name of the stage
+        @param duration - run time in seconds
+        """
+        if self.stats_enabled:
+            self.getStage(name).add(duration)
+
+
+    def skipStage(self, name):
+        """ This method counts a skipped run of the named stage.
+
+        @param name - name of the stage
+        """
+        if self.stats_enabled:
+            self.getStage(name).skip()
+
+
+    def hasMotion(self, image):
+        """ This method checks with the motion gate whether the frame changed since the last
+            processed one. The check is timed as 'motion' stage.
+
+        @param image - image array
+        @return boolean - False if the cached result of the last processed frame can be used
+        """
+        if not self.motion.isEnabled():
+            return True
+
+        with self.timeStage('motion'):
+            return self.motion.hasChanged(image)
+
+
+    def publishTo(self, port, name, func, *args):
+        """ This method calls func with the given arguments as a timed run of the named stage if the
+            port has readers. Otherwise the call is skipped and counted as such.
+
+        @param port - output port the stage produces data for
+        @param name - name of the stage
+        @param func - function to call
+        @return result of func or None if it was skipped
+        """
+        if not self.hasReaders(port):
+            self.skipStage(name)
+            return None
+
+        with self.timeStage(name):
+            return func(*args)
+
+
+    def fillStats(self, bottle):
+        """ This method adds the statistics of all stages to the given bottle.
+
+        Message: ( <name> <runs> <skipped> <mean> <p50> <p95> <p99> <fps> )*
+
+        The times are given in milliseconds.
+
+        @param bottle - yarp Bottle
+        """
+        for stage in self._stages.values():
+            values = bottle.addList()
+            values.addString(stage.name)
+            values.addInt(stage.count)
+            values.addInt(stage.skipped)
+            values.addDouble(stage.getMean()         * 1000.0)
+            values.addDouble(stage.getPercentile(50) * 1000.0)
+            values.addDouble(stage.getPercentile(95) * 1000.0)
+            values.addDouble(stage.getPercentile(99) * 1000.0)
+            values.addDouble(stage.getFps())
+
+
+    def _publishStats(self):
+        """ This method sends the statistics to the stats port every stats_period seconds. """
+
+        while not self._stop_event.wait(self.stats_period):
+
+            if self.hasReaders(self.statsPort):
+                bottle = yarp.Bottle()
+                bottle.clear()
+                self.fillStats(bottle)
+                self.statsPort.write(bottle)
+
+
 ####################################################################################################
 #
 # Default methods for running the modules standalone
 #
 ####################################################################################################
+def addStatsArguments(parser):
+    """ This method adds the instrumentation arguments to an argument parser.
+
+    @param parser - Argument Parser object
+    """
+    parser.add_argument( '--no-stats',
+                         dest       = 'no_stats',
+                         action     = 'store_true',
+                         help       = 'Disable the per-stage timing of the module.')
+
+    parser.add_argument( '--stats-period',
+                         dest       = 'stats_period',
+                         type       = type(0.0),
+                         default    = 0.0,
+                         help       = 'Publish the stage statistics on stats:o every N seconds.')
+
+
+def addMotionArguments(parser):
+    """ This method adds the motion gate arguments to an argument parser.
+
+    @param parser - Argument Parser object
+    """
+    parser.add_argument( '--motion-threshold',
+                         dest       = 'motion_threshold',
+                         type       = type(0.0),
+                         default    = 0.0,
+                         help       = 'Skip the detection if no image block changed by more than '
+                                      'this mean gray level difference; 0 disables it.')
+
+    parser.add_argument( '--motion-refresh',
+                         dest       = 'motion_refresh',
+                         type       = type(0.0),
+                         default    = 5.0,
+                         help       = 'Run the detection at least every N seconds.')
+
+
+def addScheduleArguments(parser):
+    """ This method adds the scheduling arguments to an argument parser.
+
+    @param parser - Argument Parser object
+    """
+    parser.add_argument( '--schedule',
+                         dest       = 'schedule',
+                         choices    = SCHEDULES,
+                         default    = S_PERIODIC,
+                         help       = 'Process inputs periodically or as soon as they arrive.')
+
+
 def createArgParser():
     """ This method creates a base argument parser.
 
@@ -93,6 +394,9 @@ def createArgParser():
                          default    = '',
                          help       = 'Name prefix for Yarp port names')
 
+    addStatsArguments(parser)
+    addScheduleArguments(parser)
+
     return parser.parse_args()
 
 
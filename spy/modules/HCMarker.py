@@ -17,21 +17,26 @@
 ####################################################################################################
 import argparse
 import os.path as op
-import time
-import yarp
 
 try:
     import cv2
 except ImportError:
     print '[HCMarkerModule] Can not import cv2. This module will raise a RuntimeException.'
 
+import numpy as np
+import yarp
 
 try:
     from ar_markers.hamming.detect import detect_markers
 except ImportError:
-    print '[HCMarkerModule] Can not import ar_markers. This module will raise a RuntimeException.'
+    print '[HCMarkerModule] Can not import ar_markers. Only the builtin detector is available.'
 
-from spy.modules.BaseModule import BaseModule, main
+from spy.detectors.hamming  import detectMarkers
+from spy.modules.BaseModule import BaseModule, S_PERIODIC, main
+from spy.modules.BaseModule import addMotionArguments, addScheduleArguments, addStatsArguments
+from spy.models.marker      import MarkerRecord
+from spy.utils.memory       import MarkerMemory
+from spy.utils.pipeline     import Pipeline
 
 
 class HCMarker(BaseModule):
@@ -45,12 +50,38 @@ class HCMarker(BaseModule):
     O_HORIZONTAL = 0
     O_VERTICAL   = 1
 
+    # marker detectors
+    D_BUILTIN    = 'builtin'
+    D_AR_MARKERS = 'ar_markers'
+    DETECTORS    = [ D_BUILTIN, D_AR_MARKERS ]
+
+    # highlight colors in the RGB channel order of yarp images
+    C_CONTOUR    = (0, 255, 0)
+    C_TEXT       = (0, 0, 255)
+
 
     def __init__(self, args):
         BaseModule.__init__(self, args)
-        self.memory_length  = args.memory
+        self.memory         = MarkerMemory(args.memory, getattr(args, 'memory_size', 0))
         self.translation    = args.translation
         self.translation_db = {}
+        self.translations   = {}
+        self.last_publish   = None
+        self.pipelined      = args.pipeline
+        self.queue_size     = args.queue_size
+        self.detector       = getattr(args, 'detector', HCMarker.D_BUILTIN)
+        self.last_detected  = []
+        self.pipeline       = None
+
+        # grayscale, gradient and edge images of the builtin detector @see convertFrame
+        self.bufGray        = None
+        self.bufEdges       = None
+        self.bufDx          = None
+        self.bufDy          = None
+
+        # the pipeline threads already process each frame as it arrives
+        if self.pipelined:
+            self.schedule   = S_PERIODIC
 
         if self.translation:
 
@@ -64,6 +95,10 @@ class HCMarker(BaseModule):
                     mid, word = line.split()
                     self.translation_db[int(mid)] = word
 
+        # translated strings per marker id
+        for mid, word in self.translation_db.items():
+            self.translations[mid] = str(word)
+
 
     def configure(self, rf):
 
@@ -73,61 +108,148 @@ class HCMarker(BaseModule):
         self.orderPort       = self.createOutputPort('order')
         self.translationPort = self.createOutputPort('translation')
 
-        self.imgInPort       = self.createInputPort('img')
-        self.imgOutPort      = self.createOutputPort('img')
+        self.imgInPort       = self.createInputPort('img', 'image')
+        self.imgOutPort      = self.createOutputPort('img', mode = 'image')
 
-        self.bufImageIn,  self.bufArrayIn  = self.createImageBuffer(640, 480, 3)
-        self.bufImageOut, self.bufArrayOut = self.createImageBuffer(640, 480, 3)
+        # the buffers follow the resolution of the incoming images; the output buffer is only
+        # used in pipelined mode as otherwise the annotated input buffer is sent
+        self.bufImageIn,  self.bufArrayIn  = self.createImageBuffer( HCMarker.D_WIDTH,
+                                                                     HCMarker.D_HEIGHT,
+                                                                     3 )
+        self.bufImageOut, self.bufArrayOut = self.createImageBuffer( HCMarker.D_WIDTH,
+                                                                     HCMarker.D_HEIGHT,
+                                                                     3 )
 
         self.order           = HCMarker.O_HORIZONTAL
         self.orderIsReversed = False
 
-        self.memory          = {}
+        # in pipelined mode reading, detecting and publishing run in their own threads
+        if self.pipelined:
+            self.pipeline = Pipeline(self.queue_size)
+            self.pipeline.addStage('read',    self.copyFrame)
+            self.pipeline.addStage('detect',  lambda image: (image, self.detect(image)))
+            self.pipeline.addStage('publish', self.publishFrame)
+            self.pipeline.start()
 
         return True
 
 
-    def updateModule(self):
+    def interruptModule(self):
+        BaseModule.interruptModule(self)
 
-        if self.imgInPort.read(self.bufImageIn):
+        if self.pipeline:
+            self.pipeline.stop()
 
-            # Make sure the image has not been re-allocated
-            assert self.bufArrayIn.__array_interface__['data'][0] == self.bufImageIn.getRawImage().__long__()
+        return True
 
-            # convert image to be usable in OpenCV
-            image  = cv2.cvtColor(self.bufArrayIn, cv2.COLOR_BGR2RGB)
 
-            # and convert image back to something the yarpview can understand
-            self.bufArrayOut[:,:] = cv2.cvtColor(self.onImage(image), cv2.COLOR_RGB2BGR)
+    def process(self):
 
-            # Send the result to the output port
-            self.imgOutPort.write(self.bufImageOut)
+        # the pipeline threads do the work; the module stops if one of them died
+        if self.pipeline:
+            BaseModule.process(self)
+            return self.pipeline.isAlive()
+
+        image = self.readFrame()
+
+        if image is not None:
+
+            # the markers are drawn into the input buffer which is then sent as it is
+            self.onImage(image)
+            self.publishTo(self.imgOutPort, 'image', self.imgOutPort.write, self.bufImageIn)
 
         return True
 
 
-    def sendOrder(self, markers):
+    def readFrame(self):
+        """ This method reads a frame from the image input port into the input buffer.
+
+        @return image array in the RGB channel order of yarp or None if no image could be read
+        """
+        with self.timeStage('read'):
+            if not self.imgInPort.read(self.bufImageIn):
+                return None
+
+        # follow resolution changes of the input
+        self.bufImageIn, self.bufArrayIn = self.refreshImageBuffer(self.bufImageIn, self.bufArrayIn)
+
+        return self.bufArrayIn
+
+
+    def copyFrame(self, _ = None):
+        """ This method reads a frame and returns a copy of it. The pipeline needs the copy as the
+            input buffer is overwritten by the next read while the frame is still processed.
+
+        @return image array or None if no image could be read
+        """
+        image = self.readFrame()
+        return image.copy() if image is not None else None
+
+
+    def publishFrame(self, item):
+        """ This method publishes the markers and the image of a frame in pipelined mode.
+
+        @param item - (image array, list of MarkerRecord)
+        """
+        image, marker_list = item
+        self.publish(image, marker_list)
+        self.publishTo(self.imgOutPort, 'image', self.writeImage, image)
+
+
+    def writeImage(self, image):
+        """ This method sends an image to the image output port.
+
+        @param image - image array in the RGB channel order of yarp
+        """
+
+        height, width = image.shape[:2]
+        self.bufImageOut, self.bufArrayOut = self.resizeImageBuffer( self.bufImageOut,
+                                                                     self.bufArrayOut,
+                                                                     width,
+                                                                     height )
+        np.copyto(self.bufArrayOut, image)
+
+        # Send the result to the output port
+        self.imgOutPort.write(self.bufImageOut)
+
+
+    def packMarkers(self, marker_list):
+        """ This method packs the markers into one array sorted according to the order settings.
+
+        Row: <id> <center-x> <center-y> <p1-x> <p1-y> <p2-x> <p2-y> <p3-x> <p3-y> <p4-x> <p4-y>
+
+        @param marker_list - list of MarkerRecord
+        @return numpy (n, 11) int array
+        """
+        if not marker_list:
+            return np.zeros( (0, 11), dtype = np.int32 )
+
+        packed = np.array([ (marker.id,) + marker.center + tuple(marker.contours.flat)
+                            for marker in marker_list ], dtype = np.int32)
+
+        # stable sort; the descending order keeps the detection order of equal positions as well
+        keys   = packed[:, 1 + self.order]
+        keys   = -keys if self.orderIsReversed else keys
+        return packed[np.argsort(keys, kind = 'mergesort')]
+
+
+    def sendOrder(self, packed):
         """ This method sends the order information to the order port.
 
         Message: <markerid-1> <markerid-2> ... <markerid-n>
 
         All values are integer values.
 
-        @param markers - list of HammingMarker from ar_markers package.
+        @param packed - sorted marker array @see packMarkers
         """
 
-        markers.sort(key = lambda x: x.center[self.order], reverse = self.orderIsReversed)
-
         bottle = yarp.Bottle()
-        bottle.clear()
-
-        for marker in markers:
-            bottle.addInt(marker.id)
+        bottle.fromString(' '.join(map(str, packed[:, 0].tolist())))
 
         self.orderPort.write(bottle)
 
 
-    def sendTranslation(self, markers):
+    def sendTranslation(self, packed):
         """ This method sends the translated marker IDs to the translation port. Order depends on
             the order settings. In case no translation for a marker ID is provided the marker ID
             will be returned as string.
@@ -136,26 +258,22 @@ class HCMarker(BaseModule):
 
         The message is one string containing the words separated by a space.
 
-        @param markers - list of HammingMarker from ar_markers package.
+        @param packed - sorted marker array @see packMarkers
         """
 
-        markers.sort(key = lambda x: x.center[self.order], reverse = self.orderIsReversed)
+        words = self.translations
 
         bottle = yarp.Bottle()
         bottle.clear()
 
-        # create translation string list
-        translation = []
-        for marker in markers:
-            translation.append(str(self.translation_db.get(marker.id, marker.id)))
-
-        # transmit the joined strings
-        bottle.addString(' '.join(translation))
+        # transmit the joined strings; the ids without translation are cached on first use
+        bottle.addString(' '.join([ words.get(mid) or words.setdefault(mid, str(mid))
+                                    for mid in packed[:, 0].tolist() ]))
 
         self.translationPort.write(bottle)
 
 
-    def sendMarkers(self, markers):
+    def sendMarkers(self, packed):
         """ This method sends the marker information to the markers port.
 
         Message: <number of markers> ( ( <id> <center-x>  <center-y> <contour> )* )
@@ -163,74 +281,145 @@ class HCMarker(BaseModule):
 
         All values are integer values.
 
-        @param markers - list of HammingMarker from ar_markers package.
+        @param packed - sorted marker array @see packMarkers
         """
 
+        # the whole message is added with one call
+        markers = ' '.join([ '(%d %d %d (%d %d %d %d %d %d %d %d))' % row
+                             for row in map(tuple, packed.tolist()) ])
+
         bottle  = yarp.Bottle()
-        bottle.clear()
+        bottle.fromString('%d (%s)' % (len(packed), markers))
 
-        bottle.addInt(len(markers))
-        markers_list = bottle.addList()
+        self.markersPort.write(bottle)
 
-        for marker in markers:
 
-            center_x, center_y        = marker.center
-            marker_values = markers_list.addList()
-            marker_values.addInt(marker.id)
-            marker_values.addInt(center_x)
-            marker_values.addInt(center_y)
-            marker_contour = marker_values.addList()
+    def onImage(self, image):
+        """ This method gets called upon receiving an input image given by image.
 
-            for value in marker.contours:
-                marker_contour.addInt(int(value[0][0]))
-                marker_contour.addInt(int(value[0][1]))
+        The method detects the markers. Then it chooses one MarkerRecord object for each recognized
+        marker id and draws it into the image. Afterwards the additional information is send to
+        the corresponding ports.
 
-        self.markersPort.write(bottle)
+        The image is used in the RGB channel order of yarp. The markers are black and white so the
+        detection does not depend on the channel order and no conversion is needed.
 
+        @param image - image array in the RGB channel order of yarp
+        """
+        return self.publish(image, self.detect(image))
 
-    def onImage(self, cv2_image):
-        """ This method gets called upon receiving an input image given by cv2_image.
 
-        The method detects the markers. Then it chooses one HammingMarker object for each recognized
-        marker id and draws it on the output image. Afterwards the additional information is send to
-        the corresponding ports.
+    def convertFrame(self, image):
+        """ This method converts the image to grayscale for the builtin detector. The grayscale
+            image, the gradients and the edge image of the detector use buffers that are only
+            re-allocated if the resolution changes.
+
+        @param image - image array in the RGB channel order of yarp
+        @return grayscale image array
+        """
+        shape = image.shape[:2]
+
+        if self.bufEdges is None or self.bufEdges.shape != shape:
+            self.bufGray  = np.empty(shape, dtype = np.uint8)
+            self.bufEdges = np.empty(shape, dtype = np.uint8)
+            self.bufDx    = np.empty(shape, dtype = np.int16)
+            self.bufDy    = np.empty(shape, dtype = np.int16)
+
+        return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY, dst = self.bufGray)
+
+
+    def detect(self, image):
+        """ This method detects the markers in the given image and applies the marker memory. If
+            the motion gate finds no change the markers of the last processed frame are used.
 
-        @param cv2_image - an OpenCV image object
+        @param image - image array
+        @return list of MarkerRecord
         """
+        gray = image
 
-        # we only care for one contour
-        markers = {}
-        for marker in detect_markers(cv2_image):
-            markers[marker.id] = marker
+        if self.detector == HCMarker.D_BUILTIN:
+            with self.timeStage('convert'):
+                gray = self.convertFrame(image)
 
-        marker_list = [ markers[mid] for mid in markers ]
+        if not self.hasMotion(gray):
+            self.skipStage('detect')
+            marker_list = self.last_detected
+
+        else:
+
+            # we only care for one contour
+            markers = {}
+            with self.timeStage('detect'):
+                if self.detector == HCMarker.D_AR_MARKERS:
+                    detected = detect_markers(image)
+                else:
+                    detected = detectMarkers(image, gray, self.bufEdges, self.bufDx, self.bufDy)
+
+                for marker in detected:
+                    markers[marker.id] = marker
+
+            marker_list        = [ MarkerRecord.fromMarker(markers[mid]) for mid in markers ]
+            self.last_detected = marker_list
 
         # handle memory
-        if self.memory_length > 0:
+        if self.memory.length > 0:
+            marker_list = self.memory.update(marker_list)
 
-            # set all current marker information
-            cur_time = time.time()
-            for marker in marker_list:
-                self.memory[marker.id] = ( marker, cur_time )
+        return marker_list
 
-            # create new marker list and only include marker which are within the time frame
-            marker_list = [ self.memory[mid][0] for mid in self.memory if cur_time - self.memory[mid][1] < self.memory_length ]
 
-        # highlight markers in output image
-        for marker in marker_list:
-            marker.highlite_marker(cv2_image)
+    def publish(self, image, marker_list):
+        """ This method draws the markers into the image and sends the marker information to the
+            corresponding ports.
+
+        @param image       - image array in the RGB channel order of yarp
+        @param marker_list - list of MarkerRecord
+        @return the annotated image
+        """
+
+        # each output is only produced if someone is connected to it
+        self.publishTo(self.imgOutPort, 'draw', self.drawMarkers, image, marker_list)
+
+        with self.timeStage('pack'):
+            packed = self.packMarkers(marker_list)
+
+        # the marker information is only sent again if the markers, their order or the readers
+        # changed since the last frame
+        ports    = ( self.markersPort, self.orderPort, self.translationPort )
+        settings = ( self.order, self.orderIsReversed, [ self.hasReaders(port) for port in ports ] )
 
-        self.sendMarkers(marker_list)
-        self.sendOrder(marker_list)
-        self.sendTranslation(marker_list)
+        if ( self.last_publish is not None and self.last_publish[0] == settings and
+             np.array_equal(self.last_publish[1], packed) ):
 
-        return cv2_image
+            for name in ( 'markers', 'order', 'translation' ):
+                self.skipStage(name)
 
+            return image
 
-    def respond(self, command, reply):
+        self.last_publish = ( settings, packed )
+
+        self.publishTo(self.markersPort,     'markers',     self.sendMarkers,     packed)
+        self.publishTo(self.orderPort,       'order',       self.sendOrder,       packed)
+        self.publishTo(self.translationPort, 'translation', self.sendTranslation, packed)
+
+        return image
+
+
+    @staticmethod
+    def drawMarkers(image, marker_list):
+        """ This method highlights the markers in the image.
+
+        @param image       - image array in the RGB channel order of yarp
+        @param marker_list - list of MarkerRecord
+        """
+        for marker in marker_list:
+            marker.highlite_marker(image, HCMarker.C_CONTOUR, HCMarker.C_TEXT)
+
+
+    def respond(self, bottle, reply):
 
         success = False
-        command = command.toString().split(' ')
+        command = bottle.toString().split(' ')
 
         if command[0] == 'set':
 
@@ -255,13 +444,36 @@ class HCMarker(BaseModule):
                 reply.add('normal' if not self.orderIsReversed else 'reversed')
                 success = True
 
+            elif command[1] == 'pipeline' and self.pipeline:
+
+                # one list per stage: <name> <processed> <dropped> <queue> <occupancy> <errors>
+                for stats in self.pipeline.getStats():
+                    stage = reply.addList()
+                    stage.addString(stats['name'])
+                    stage.addInt(stats['processed'])
+                    stage.addInt(stats['dropped'])
+                    stage.addInt(stats['queue'])
+                    stage.addDouble(stats['occupancy'])
+                    stage.addInt(stats['errors'])
+                success = True
+
         elif command[0] == 'memory':
 
-            self.memory_length = float(command[1])
+            # only the limits are set here; the memory itself is changed by the processing thread
+            # only, which applies the new limits on its next update
+            self.memory.length = float(command[1])
+
+            if len(command) > 2:
+                self.memory.size = int(command[2])
+
             success = True
 
 
-        reply.addString('ack' if success else 'nack')
+        # everything else is handled by the base module e.g. 'stats'
+        if not success:
+            return BaseModule.respond(self, bottle, reply)
+
+        reply.addString('ack')
         return True
 
 
@@ -282,11 +494,38 @@ def createArgParser():
                          default    = 0,
                          help       = 'Defines how long the marker positions are kept in memory.')
 
+    parser.add_argument( '-s', '--memory-size',
+                         dest       = 'memory_size',
+                         type       = type(0),
+                         default    = 0,
+                         help       = 'Maximal number of markers kept in memory, 0 means no limit.')
+
     parser.add_argument( '-t', '--translation',
                          dest       = 'translation',
                          default    = '',
                          help       = 'Give a file path to a translation file.')
 
+    parser.add_argument( '-p', '--pipeline',
+                         dest       = 'pipeline',
+                         action     = 'store_true',
+                         help       = 'Run reading, detection and publishing in separate threads.')
+
+    parser.add_argument( '-q', '--queue-size',
+                         dest       = 'queue_size',
+                         type       = type(0),
+                         default    = 1,
+                         help       = 'Number of frames queued between the pipeline stages.')
+
+    parser.add_argument( '-d', '--detector',
+                         dest       = 'detector',
+                         choices    = HCMarker.DETECTORS,
+                         default    = HCMarker.D_BUILTIN,
+                         help       = 'Marker detector, the builtin one or the one of ar_markers.')
+
+    addMotionArguments(parser)
+    addStatsArguments(parser)
+    addScheduleArguments(parser)
+
     return parser.parse_args()
 
 
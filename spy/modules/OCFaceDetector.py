@@ -15,23 +15,68 @@
 #    You should have received a copy of the GNU Affero General Public License                      #
 #    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
 ####################################################################################################
-import os.path as op
+import argparse
+import collections
+import multiprocessing
+import time
 
 try:
     import cv2
 except ImportError:
     print '[OCFaceDetector] Can not import cv2. This module will raise a RuntimeException.'
 
+import numpy as np
 import yarp
 
 
-from spy.modules.BaseModule import BaseModule, main
-from spy.utils              import getFiles
+from spy.modules.BaseModule import BaseModule, addMotionArguments, addScheduleArguments
+from spy.modules.BaseModule import addStatsArguments, main
+from spy.detectors.faces    import BACKENDS, CASCADES, DETECTOR, HaarDetector, createDetector
+from spy.detectors.faces    import detectEyes, detectFaces, findFaces
+
+
+# image buffers shared with the worker processes; set by the pool initializer
+_WORKER_ARRAYS = []
+
+
+def _initWorker(arrays):
+    """ This function initializes a detection worker process.
+
+    @param arrays - list of shared image buffer arrays
+    """
+    global _WORKER_ARRAYS
+    _WORKER_ARRAYS = arrays
+
+
+def _detectWorker(slot, eyes, options):
+    """ This function runs the face detection on a shared image buffer within a worker process.
+
+    @param slot    - index of the shared image buffer
+    @param eyes    - boolean specifying whether to detect the eyes
+    @param options - dictionary of detection options @see spy.detectors.faces.findFaces
+    @return faces, eyes @see spy.detectors.faces.detectFaces
+    """
+    gray = cv2.cvtColor(_WORKER_ARRAYS[slot], cv2.COLOR_RGB2GRAY)
+    return detectFaces(gray, eyes, **options)
+
+
+def parseSize(text):
+    """ This function parses a size given as '<width>x<height>'.
+
+    @param text - size string e.g. '320x240'
+    @return (width, height)
+    """
+    try:
+        width, height = [ int(value) for value in text.lower().split('x') ]
+    except ValueError:
+        raise argparse.ArgumentTypeError('Size [%s] is not of the form <width>x<height>.' % text)
+
+    return width, height
 
 
 class OCFaceDetector(BaseModule):
-    """ The OCFaceDetector class provides a yarp module for recognizing faces based on the OpenCV
-        Haarcasade Classifier implementation.
+    """ The OCFaceDetector class provides a yarp module for recognizing faces based on one of the
+        OpenCV face detectors @see spy.detectors.faces.
     """
     D_WIDTH      = 640
     D_HEIGHT     = 480
@@ -39,22 +84,60 @@ class OCFaceDetector(BaseModule):
     O_HORIZONTAL = 0
     O_VERTICAL   = 1
 
-    HC           = {}
+    # highlight colors in the RGB channel order of yarp images
+    C_FACE       = (0, 0, 255)
+    C_EYE        = (0, 255, 0)
 
+    # cascades are loaded on first use and shared by all instances
+    HC           = CASCADES
 
-    #
-    # Global initialization of the haarcascades
-    #
-    try:
-        files = getFiles('/usr/local/share/opencv/haarcascades')
-        for _file in files:
-            _, filename = op.split(_file)
+    # margin added around a tracked face box relative to its size
+    TRACK_MARGIN = 0.5
+
+
+    def __init__(self, args):
+        BaseModule.__init__(self, args)
+        self.workers = getattr(args, 'workers', 0)
+        self.pool    = None
 
-            if filename.startswith('haarcascade'):
-                cname = filename.replace('haarcascade_', '').replace('.xml', '')
-                HC[cname] = cv2.CascadeClassifier(_file)
-    except Exception as e:
-        print e
+        # in worker mode the frame rate is defined by the image input port
+        if self.workers > 0:
+            self.period = 0.0
+
+        # tracking settings; a full detection runs every track_interval frames
+        self.track_interval = getattr(args, 'track', 0)
+        self.track_count    = 0
+        self.tracked        = []
+
+        # result of the last processed frame, used while the motion gate finds no change
+        self.last_faces     = []
+        self.last_eyes      = None
+        self.last_result    = None
+
+        # detection resolution and face size limits @see findFaces
+        self.detect_options = { 'detect_size': getattr(args, 'detect_size', None),
+                                'min_size':    getattr(args, 'min_size',    None),
+                                'max_size':    getattr(args, 'max_size',    None) }
+
+        if getattr(args, 'cascades', ''):
+            OCFaceDetector.HC.setPaths(args.cascades)
+
+        # the eyes are detected within the faces unless disabled
+        self.eyes           = getattr(args, 'eyes', True)
+
+        # settings changed over RPC as (method, value); the processing thread applies them before
+        # the next frame, as they reset state it uses
+        self.changes        = collections.deque()
+
+        # parameters of all backends; a backend switch only changes the ones given
+        self.backend_params = { 'scale_factor':  getattr(args, 'scale_factor',  None),
+                                'min_neighbors': getattr(args, 'min_neighbors', None),
+                                'confidence':    getattr(args, 'confidence',    None),
+                                'model':         getattr(args, 'dnn_model',     None),
+                                'config':        getattr(args, 'dnn_config',    None) }
+
+        self.setBackend(getattr(args, 'backend', HaarDetector.NAME))
+        self.applyChanges()
 
 
     def configure(self, rf):
@@ -63,34 +146,196 @@ class OCFaceDetector(BaseModule):
 
         self.facesPort     = self.createOutputPort('faces')
         self.skeletonPort  = self.createOutputPort('skeleton')
+        self.eyesPort      = self.createOutputPort('eyes')
+
+        self.imgInPort     = self.createInputPort('img', 'image')
+        self.imgOutPort    = self.createOutputPort('img', mode = 'image')
+
+        # the buffer follows the resolution of the incoming images; the faces are drawn into it
+        # and it is sent as output image
+        self.bufImageIn,  self.bufArrayIn  = self.createImageBuffer( OCFaceDetector.D_WIDTH,
+                                                                     OCFaceDetector.D_HEIGHT,
+                                                                     3 )
+
+        # scratch buffer for the grayscale conversion
+        self.bufGray       = np.empty( (OCFaceDetector.D_HEIGHT, OCFaceDetector.D_WIDTH),
+                                       dtype = np.uint8 )
+
+        if self.workers > 0:
+            self.startWorkers(self.createImageBuffer( OCFaceDetector.D_WIDTH,
+                                                      OCFaceDetector.D_HEIGHT,
+                                                      3,
+                                                      shared = True ))
+
+        return True
+
+
+    def close(self):
+        BaseModule.close(self)
+
+        if self.pool:
+            self.pool.terminate()
+            self.pool.join()
+
+        return True
+
+
+    def process(self):
+
+        self.applyChanges()
+
+        if self.pool:
+            return self.updateWorkers()
 
-        self.imgInPort     = self.createInputPort('img')
-        self.imgOutPort    = self.createOutputPort('img')
+        with self.timeStage('read'):
+            success = self.imgInPort.read(self.bufImageIn)
 
-        self.bufImageIn,  self.bufArrayIn  = self.createImageBuffer(640, 480, 3)
-        self.bufImageOut, self.bufArrayOut = self.createImageBuffer(640, 480, 3)
+        if success:
+
+            # follow resolution changes of the input
+            self.bufImageIn, self.bufArrayIn = self.refreshImageBuffer( self.bufImageIn,
+                                                                        self.bufArrayIn )
+
+            self.onImage(self.bufArrayIn)
+            self.publishTo(self.imgOutPort, 'image', self.imgOutPort.write, self.bufImageIn)
 
         return True
 
 
+    def startWorkers(self, buffers):
+        """ This method (re-)starts the worker pool on shared image buffers of the resolution of the
+            given buffers. Frames of a previous pool are published before it is terminated.
+
+        @param buffers - shared (image, buffer array) pair used as first buffer of the pool
+        @return index of the first buffer; all buffers are free
+        """
+
+        if self.pool:
+            self.publishResults(flush = True)
+            self.pool.terminate()
+            self.pool.join()
+
+        height, width = buffers[1].shape[:2]
+
+        # two frames per worker keep the workers busy while results are published
+        self.slotBuffers = [ buffers ] + [ self.createImageBuffer(width, height, 3, shared = True)
+                                           for _ in range(2 * self.workers - 1) ]
+        self.freeSlots   = collections.deque(range(len(self.slotBuffers)))
+        self.pending     = collections.deque()
+
+        # the workers are forked after the buffers exist so they share their memory
+        self.pool        = multiprocessing.Pool( self.workers,
+                                                 _initWorker,
+                                                 ([ array for _, array in self.slotBuffers ],) )
+        return 0
+
+
+    def updateWorkers(self):
+        """ This method reads a frame into a free shared buffer and hands it to the worker pool.
+            Finished frames are published in the order they were read.
+        """
+
+        slot                 = self.freeSlots.popleft()
+        buf_image, buf_array = self.slotBuffers[slot]
+
+        with self.timeStage('read'):
+            success = self.imgInPort.read(buf_image)
+
+        if success:
+
+            # a new resolution needs new shared buffers and therefore new workers
+            buffers = self.refreshImageBuffer(buf_image, buf_array, shared = True)
+            if buffers[1] is not buf_array:
+                slot = self.startWorkers(buffers)
+                self.freeSlots.remove(slot)
+                self.last_result = None
+
+            changed = self.hasMotion(self.slotBuffers[slot][1])
+            eyes    = self.needsEyes()
+
+            # an unchanged frame gets the result of the last processed one; a frame without eyes
+            # can not stand in for a frame that needs them
+            if not changed and self.last_result is not None and (self.last_result[1] or not eyes):
+                self.skipStage('detect')
+                self.pending.append( (slot, self.last_result[0], None) )
+
+            else:
+
+                args             = (slot, eyes, self.detect_options)
+                self.last_result = (self.pool.apply_async(_detectWorker, args), eyes)
+                self.pending.append( (slot, self.last_result[0], time.time()) )
+
+        else:
+            self.freeSlots.append(slot)
+
+        self.publishResults()
+        return True
+
+
+    def publishResults(self, flush = False):
+        """ This method publishes the finished frames of the worker pool in the order they were
+            read. It waits for the oldest frame if all buffers are in use. The detect stage is
+            timed from the submission of a frame until its result is collected.
+
+        @param flush - if True it waits for all pending frames (default: False)
+        """
+        while self.pending and (flush or not self.freeSlots or self.pending[0][1].ready()):
+
+            slot, result, start  = self.pending.popleft()
+            faces, eyes          = result.get()
+            buf_image, buf_array = self.slotBuffers[slot]
+
+            if start is not None:
+                self.addStage('detect', time.time() - start)
+
+            # the faces are drawn into the shared buffer which is then sent as it is
+            self.publish(buf_array, faces, eyes)
+            self.publishTo(self.imgOutPort, 'image', self.imgOutPort.write, buf_image)
+            self.freeSlots.append(slot)
+
+
+    def respond(self, bottle, reply):
+
+        success = False
+        command = bottle.toString().split(' ')
 
+        if command[0] == 'set' and len(command) > 2:
 
-    def updateModule(self):
+            # set backend <name> [<param> <value>]*
+            if command[1] == 'backend' and len(command) % 2 == 1:
 
-        if self.imgInPort.read(self.bufImageIn):
+                try:
+                    self.setBackend(command[2], **dict(zip(command[3::2], command[4::2])))
+                    success = True
+                except ValueError:
+                    pass
 
-            # Make sure the image has not been re-allocated
-            assert self.bufArrayIn.__array_interface__['data'][0] == self.bufImageIn.getRawImage().__long__()
+            elif command[1] == 'eyes' and command[2] in ('on', 'off'):
+                self.changes.append( (self.useEyes, command[2] == 'on') )
+                success = True
 
-            # convert image to be usable in OpenCV
-            image  = cv2.cvtColor(self.bufArrayIn, cv2.COLOR_BGR2RGB)
+        elif command[0] == 'get' and len(command) > 1:
 
-            # and convert image back to something the yarpview can understand
-            self.bufArrayOut[:,:] = cv2.cvtColor(self.onImage(image), cv2.COLOR_RGB2BGR)
+            # <name> (<param> <value>)* of the current backend
+            if command[1] == 'backend':
+                detector = self.detect_options['detector']
+                reply.addString(detector.NAME)
 
-            # Send the result to the output port
-            self.imgOutPort.write(self.bufImageOut)
+                for name, value in sorted(detector.getParams().items()):
+                    param = reply.addList()
+                    param.addString(name)
+                    param.addString(str(value))
+                return True
 
+            elif command[1] == 'eyes':
+                reply.addString('on' if self.eyes else 'off')
+                return True
+
+        # everything else is handled by the base module e.g. 'stats'
+        if not success:
+            return BaseModule.respond(self, bottle, reply)
+
+        reply.addString('ack')
         return True
 
 
@@ -130,6 +375,39 @@ class OCFaceDetector(BaseModule):
         self.facesPort.write(bottle)
 
 
+    def sendEyes(self, faces, eyes):
+        """ This method sends the eyes of each face to the eyes port.
+
+        Message: <number of faces> ( ( <id> ( ( <x> <y> <width> <height> )* ) )* )
+
+        The id is the one of the face on the faces port. All values are integer values in image
+        coordinates.
+
+        @param faces - list of face boxes
+        @param eyes  - list of eye boxes for each face relative to the face box
+        """
+        bottle     = yarp.Bottle()
+        bottle.clear()
+
+        bottle.addInt(len(faces))
+        faces_list = bottle.addList()
+
+        for face_id, ((x, y, _, _), face_eyes) in enumerate(zip(faces, eyes)):
+
+            _values   = faces_list.addList()
+            _values.addInt(face_id)
+            _eyes     = _values.addList()
+
+            for (e_x, e_y, e_width, e_height) in face_eyes:
+                _eye = _eyes.addList()
+                _eye.addInt(int(x + e_x))
+                _eye.addInt(int(y + e_y))
+                _eye.addInt(int(e_width))
+                _eye.addInt(int(e_height))
+
+        self.eyesPort.write(bottle)
+
+
     def sendPseudoSkeleton(self, faces):
         """ This method sends the face information to the pseudo skeleton port.
 
@@ -165,38 +443,311 @@ class OCFaceDetector(BaseModule):
         self.skeletonPort.write(bottle)
 
 
-    def onImage(self, cv2_image):
-        """ This method gets called upon receiving an input image given by cv2_image.
+    def setBackend(self, name, **params):
+        """ This method switches the face detector backend. The backend is created and checked
+            right away, the processing thread puts it in place before the next frame. The given
+            parameters are kept for later switches.
+
+        @param name   - name of the backend @see spy.detectors.faces.BACKENDS
+        @param params - backend parameters @see spy.detectors.faces.FaceDetector.PARAMS
+        @raise ValueError if the backend is unknown or a parameter is invalid
+        """
+        backend_params = dict(self.backend_params, **params)
+        detector       = createDetector(name, **backend_params)
 
-        The method detects faces and draws a bounding box around them on the output image.
-        Afterwards the additional information is send to the corresponding ports.
+        self.backend_params = backend_params
+        self.changes.append( (self.useDetector, detector) )
 
-        @param cv2_image - an OpenCV image object
+
+    def useDetector(self, detector):
+        """ This method puts a face detector backend in place; the tracked faces and the last
+            result are dropped. It is called by the processing thread only @see applyChanges
+
+        @param detector - FaceDetector object
         """
+        self.detect_options['detector'] = detector
+
+        # the next frame runs a full detection with the new backend
+        self.tracked     = []
+        self.last_result = None
+        self.motion.invalidate()
+
+
+    def useEyes(self, eyes):
+        """ This method enables or disables the eye detection. It is called by the processing
+            thread only @see applyChanges
+
+        @param eyes - boolean specifying whether the eyes are detected
+        """
+        self.eyes        = eyes
+        self.last_result = None
+
+
+    def applyChanges(self):
+        """ This method applies the settings changed over RPC in the order they were made. """
+        while self.changes:
+            method, value = self.changes.popleft()
+            method(value)
 
-        # we only care for one contour
-        gray  = cv2.cvtColor(cv2_image, cv2.COLOR_RGB2GRAY)
-        faces = OCFaceDetector.HC['frontalface_default'].detectMultiScale(gray, 1.3, 5)
+
+    @staticmethod
+    def searchRegions(gray, faces, detector = None):
+        """ This method searches each face again within an enlarged region around its last box.
+
+        @param gray     - grayscale OpenCV image
+        @param faces    - list of face boxes from the previous frame
+        @param detector - FaceDetector backend (default: None uses the Haar cascade)
+        @return list of face boxes or None if one of the faces got lost
+        """
+        img_height, img_width = gray.shape[:2]
+        found                 = []
+        detector              = detector or DETECTOR
 
         for (x, y, width, height) in faces:
-            cv2.rectangle(cv2_image, (x, y), (x + width, y + height), (255, 0, 0), 2)
-            roi_gray  = gray[y:y + height, x:x + width]
-            roi_color = cv2_image[y:y + height, x:x + width]
-            eyes      = OCFaceDetector.HC['eye'].detectMultiScale(roi_gray)
 
-            for (e_x, e_y, e_width, e_height) in eyes:
+            margin_x = int(width  * OCFaceDetector.TRACK_MARGIN)
+            margin_y = int(height * OCFaceDetector.TRACK_MARGIN)
+            left     = max(0, x - margin_x)
+            top      = max(0, y - margin_y)
+            right    = min(img_width,  x + width  + margin_x)
+            bottom   = min(img_height, y + height + margin_y)
+
+            # a face does not shrink to less than half its size between two frames
+            hits     = detector.detect( gray[top:bottom, left:right],
+                                        min_size = (width // 2, height // 2) )
+
+            if len(hits) == 0:
+                return None
+
+            # keep the largest hit within the region
+            h_x, h_y, h_width, h_height = max(hits, key = lambda hit: hit[2] * hit[3])
+            found.append( (left + h_x, top + h_y, h_width, h_height) )
+
+        return found
+
+
+    def trackFaces(self, gray):
+        """ This method detects faces by searching only the regions around the faces found in the
+            previous frame. A full frame detection runs if no face is tracked, one of the faces got
+            lost or track_interval frames have passed since the last full frame detection.
+
+        @param gray - grayscale OpenCV image
+        @return list of face boxes
+        """
+        faces = None
+
+        if len(self.tracked) > 0 and self.track_count < self.track_interval:
+            faces             = OCFaceDetector.searchRegions( gray,
+                                                              self.tracked,
+                                                              self.detect_options['detector'] )
+            self.track_count += 1
+
+        if faces is None:
+            faces            = findFaces(gray, **self.detect_options)
+            self.track_count = 0
+
+        self.tracked = faces
+        return faces
+
+
+    def publish(self, image, faces, eyes):
+        """ This method draws the faces and eyes into the image and sends the face information to
+            the corresponding ports.
+
+        @param image - image array in the RGB channel order of yarp
+        @param faces - list of face boxes
+        @param eyes  - list of eye boxes for each face or None
+        @return the annotated image
+        """
+
+        # each output is only produced if someone is connected to it
+        self.publishTo(self.imgOutPort,   'draw',     self.drawFaces,          image, faces, eyes)
+        self.publishTo(self.facesPort,    'faces',    self.sendFaces,          faces)
+        self.publishTo(self.skeletonPort, 'skeleton', self.sendPseudoSkeleton, faces)
+
+        if eyes is not None:
+            self.publishTo(self.eyesPort, 'eye_boxes', self.sendEyes, faces, eyes)
+
+        return image
+
+
+    def needsEyes(self):
+        """ This method returns whether the eyes have to be detected. They are drawn into the
+            output image and sent to the eyes port, so they are only needed if one of them has
+            readers.
+
+        @return boolean
+        """
+        return self.eyes and (self.hasReaders(self.imgOutPort) or self.hasReaders(self.eyesPort))
+
+
+    @staticmethod
+    def drawFaces(image, faces, eyes):
+        """ This method draws the faces and eyes into the image.
+
+        @param image - image array in the RGB channel order of yarp
+        @param faces - list of face boxes
+        @param eyes  - list of eye boxes for each face or None
+        """
+        if eyes is None:
+            eyes = [ () ] * len(faces)
+
+        for (x, y, width, height), face_eyes in zip(faces, eyes):
+            cv2.rectangle(image, (x, y), (x + width, y + height), OCFaceDetector.C_FACE, 2)
+            roi_color = image[y:y + height, x:x + width]
+
+            for (e_x, e_y, e_width, e_height) in face_eyes:
                 cv2.rectangle(  roi_color,
                                 (e_x, e_y),
                                 (e_x + e_width, e_y + e_height),
-                                (0, 255, 0),
+                                OCFaceDetector.C_EYE,
                                 2
                              )
 
-        self.sendFaces(faces)
-        self.sendPseudoSkeleton(faces)
 
-        return cv2_image
+    def onImage(self, image):
+        """ This method gets called upon receiving an input image given by image.
+
+        The method detects faces and draws a bounding box around them into the image. Afterwards
+        the additional information is send to the corresponding ports.
+
+        The image is used in the RGB channel order of yarp. The grayscale conversion goes into a
+        preallocated scratch buffer so that no frame sized memory is allocated per frame.
+
+        @param image - image array in the RGB channel order of yarp
+        """
+        height, width = image.shape[:2]
+        if self.bufGray.shape != (height, width):
+            self.bufGray = np.empty((height, width), dtype = np.uint8)
+
+        with self.timeStage('convert'):
+            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY, dst = self.bufGray)
+
+        # an unchanged frame gets the result of the last processed one
+        if not self.hasMotion(gray):
+            self.skipStage('detect')
+            faces = self.last_faces
+            eyes  = self.last_eyes
+
+        else:
+            with self.timeStage('detect'):
+                if self.track_interval > 0:
+                    faces = self.trackFaces(gray)
+                else:
+                    faces = findFaces(gray, **self.detect_options)
+            eyes = None
+
+        if eyes is None and self.needsEyes():
+            with self.timeStage('eyes'):
+                eyes = detectEyes(gray, faces)
+
+        elif eyes is None:
+            self.skipStage('eyes')
+
+        self.last_faces = faces
+        self.last_eyes  = eyes
+
+        return self.publish(image, faces, eyes)
+
+
+def createArgParser():
+    """ This method creates a base argument parser.
+
+    @return Argument Parser object
+    """
+    parser = argparse.ArgumentParser(description='Create a SensorModule for Yarp.')
+    parser.add_argument( '-n', '--name',
+                         dest       = 'name',
+                         default    = '',
+                         help       = 'Name prefix for Yarp port names')
+
+    parser.add_argument( '-w', '--workers',
+                         dest       = 'workers',
+                         type       = type(0),
+                         default    = 0,
+                         help       = 'Number of detection worker processes; 0 detects in-process.')
+
+    parser.add_argument( '-c', '--cascades',
+                         dest       = 'cascades',
+                         default    = '',
+                         help       = 'Search path for cascade files; overrides SPY_CASCADE_PATH.')
+
+    parser.add_argument( '-k', '--track',
+                         dest       = 'track',
+                         type       = type(0),
+                         default    = 0,
+                         help       = 'Track faces and run a full detection every K frames; '
+                                      '0 disables tracking.')
+
+    parser.add_argument( '-d', '--detect-size',
+                         dest       = 'detect_size',
+                         type       = parseSize,
+                         default    = None,
+                         help       = 'Run the face detection on a downscaled image e.g. 320x240.')
+
+    parser.add_argument( '--min-size',
+                         dest       = 'min_size',
+                         type       = parseSize,
+                         default    = None,
+                         help       = 'Smallest face size in input pixels e.g. 40x40.')
+
+    parser.add_argument( '--max-size',
+                         dest       = 'max_size',
+                         type       = parseSize,
+                         default    = None,
+                         help       = 'Largest face size in input pixels e.g. 400x400.')
+
+    parser.add_argument( '-b', '--backend',
+                         dest       = 'backend',
+                         choices    = sorted(BACKENDS),
+                         default    = HaarDetector.NAME,
+                         help       = 'Face detector: haar, lbp (faster) or dnn (needs the model).')
+
+    parser.add_argument( '--scale-factor',
+                         dest       = 'scale_factor',
+                         type       = type(0.0),
+                         default    = None,
+                         help       = 'Scale step of the cascades (default: 1.3).')
+
+    parser.add_argument( '--min-neighbors',
+                         dest       = 'min_neighbors',
+                         type       = type(0),
+                         default    = None,
+                         help       = 'Neighbors a cascade face needs (default: 5).')
+
+    parser.add_argument( '--confidence',
+                         dest       = 'confidence',
+                         type       = type(0.0),
+                         default    = None,
+                         help       = 'Minimum confidence of a dnn face (default: 0.5).')
+
+    parser.add_argument( '--dnn-model',
+                         dest       = 'dnn_model',
+                         default    = None,
+                         help       = 'Weights of the dnn backend e.g. res10_300x300.caffemodel.')
+
+    parser.add_argument( '--dnn-config',
+                         dest       = 'dnn_config',
+                         default    = None,
+                         help       = 'Network of the dnn backend e.g. deploy.prototxt.')
+
+    parser.add_argument( '--no-eyes',
+                         dest       = 'eyes',
+                         action     = 'store_false',
+                         help       = 'Do not detect the eyes within the faces.')
+
+    addMotionArguments(parser)
+    addStatsArguments(parser)
+    addScheduleArguments(parser)
+
+    args = parser.parse_args()
+
+    # the workers detect every frame on its own, the faces can not be tracked between them
+    if args.workers > 0 and args.track > 0:
+        parser.error('--track can not be combined with --workers')
+
+    return args
 
 
 if __name__ == '__main__':
-    main(OCFaceDetector)
+    main(OCFaceDetector, createArgParser())
@@ -15,9 +15,12 @@
 #    You should have received a copy of the GNU Affero General Public License                      #
 #    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
 ####################################################################################################
+import argparse
+
 import yarp
 
 from spy.modules.BaseModule        import BaseModule, main
+from spy.modules.BaseModule        import addScheduleArguments, addStatsArguments
 from spy.models.ts_skeleton        import TSSkeleton
 from spy.reader.ts_skeleton_reader import TSSkeletonReader
 
@@ -27,11 +30,28 @@ class TSUserSkeleton(BaseModule):
         userSkeleton and the TutorSpotter skeleton.
     """
 
+    # output labels of the joints e.g. 'Left_Hand'
+    JOINT_NAMES = dict( (joint, label.title().replace(' ', '_'))
+                        for joint, label in enumerate(TSSkeleton.JOINT_LABELS) )
+    JOINT_NAMES[TSSkeleton.TORSO] = 'Chest'
+
     USED_JOINTS = { TSSkeleton.HEAD:   'Head',
                     TSSkeleton.L_HAND: 'Left_Hand',
                     TSSkeleton.R_HAND: 'Right_Hand',
                     TSSkeleton.TORSO:  'Chest'  }
 
+
+    def __init__(self, args):
+        BaseModule.__init__(self, args)
+        self.batch        = getattr(args, 'batch', False)
+        self.used_joints  = getattr(args, 'joints', None) or TSUserSkeleton.USED_JOINTS.keys()
+        self.used_joints  = sorted(set(self.used_joints))
+
+        # reused for every frame
+        self.in_envelope  = yarp.Bottle()
+        self.out_envelope = yarp.Bottle()
+
+
     def configure(self, rf):
 
         BaseModule.configure(self, rf)
@@ -41,61 +61,163 @@ class TSUserSkeleton(BaseModule):
         return True
 
 
-    def updateModule(self):
+    def process(self):
 
         # read the bottle
-        input_bottle    = self.skeletonInPort.read()
+        with self.timeStage('read'):
+            input_bottle = self.skeletonInPort.read()
 
         # get the envelope as bottle
-        envelope_bottle = self.skeletonInPort.prepare()
-        envelope_bottle.clear()
-        self.skeletonInPort.getEnvelope(envelope_bottle)
+        self.in_envelope.clear()
+        self.skeletonInPort.getEnvelope(self.in_envelope)
 
         # if bottle exists run the convert method
         if input_bottle:
-            self.onBottle(input_bottle, envelope_bottle)
+            with self.timeStage('convert'):
+                self.onBottle(input_bottle, self.in_envelope)
 
         return True
 
 
     def onBottle(self, input_bottle, envelope_bottle):
 
+        # the joints are read once, 'set joints' may replace them while the frame is converted
+        joints = self.used_joints
+
         # ignore broken parsing such as "Calibration User" messages
         try:
-            data = TSSkeletonReader(input_bottle).getData()
+            data = TSSkeletonReader(input_bottle, joints = joints).getData()
         except:
             return
 
-        for key in data:
+        # the rotation matrices of all users in one call
+        TSSkeleton.computeRotationMatrices(data.values(), joints)
+
+        # pass the time value as first element in the envelop
+        self.out_envelope.clear()
+        self.out_envelope.addDouble(envelope_bottle.get(1).asDouble())
+
+        self.publishSkeletons(data.values(), joints)
+
+
+    def publishSkeletons(self, skeletons, joints):
+        """ This method writes the skeletons to the output port, either one message per user or
+            with --batch one message per frame.
+
+        Message:       ( <Joint> <conf> <x> <y> <z> Orientation <conf> <r11> ... <r33> )*
+        Batch message: ( ( <uid> <Joint> <conf> <x> <y> <z> Orientation <conf> <r11> ... <r33> )* )
+
+        @param skeletons - list of TSSkeleton
+        @param joints    - sorted list of the published joint indices
+        """
+        port = self.skeletonOutPort
+
+        if self.batch:
+            if skeletons:
+                texts = [ '(%d %s)' % (skeleton.uid, self.formatSkeleton(skeleton, joints))
+                          for skeleton in skeletons ]
+                port.prepare().fromString(' '.join(texts))
+                port.setEnvelope(self.out_envelope)
+                port.write()
+            return
+
+        for skeleton in skeletons:
+            port.prepare().fromString(self.formatSkeleton(skeleton, joints))
+            port.setEnvelope(self.out_envelope)
+
+            # strict, otherwise the message of the previous user may be dropped
+            port.write(True)
 
-            # get data and fresh bottle
-            skeleton = data[key]
-            bottle   = yarp.Bottle()
-            bottle.clear()
 
-            for joint, label in TSUserSkeleton.USED_JOINTS.items():
+    def formatSkeleton(self, skeleton, joints):
+        """ This method returns the published joints of a skeleton as bottle text, so that all
+            values are added with one call.
 
-                j_data = skeleton.data[joint]
+        @param skeleton - TSSkeleton with the rotation matrices of the used joints
+        @param joints   - sorted list of the published joint indices
+        @return string
+        """
+        rotations = skeleton.getRotationMatrices(joints)[joints].reshape(len(joints), 9)
+        positions = skeleton.positions[joints][:, [3, 0, 1, 2]]
+        ori_conf  = skeleton.ori_confidences[joints]
 
-                bottle.addString(label)
-                _ = [bottle.addDouble(value) for value in [j_data['POS'][-1]] + j_data['POS'][:3]]
+        # repr keeps the full precision and the decimal point of each double
+        return ' '.join( '%s %s Orientation %r %s' % ( TSUserSkeleton.JOINT_NAMES[joint],
+                                                       ' '.join(map(repr, position)),
+                                                       confidence,
+                                                       ' '.join(map(repr, rotation)) )
+                         for joint, position, confidence, rotation
+                         in zip(joints, positions.tolist(), ori_conf.tolist(), rotations.tolist()) )
 
-                bottle.addString("Orientation")
-                bottle.addDouble(j_data['ORI'][-1])
-                _ = [bottle.addDouble(value) for value in j_data['ORI_RM'].flatten()]
 
-            # pass the time value as first element in the envelop
-            ebottle   = yarp.Bottle()
-            ebottle.clear()
-            ebottle.addDouble(envelope_bottle.get(1).asDouble())
+    def respond(self, bottle, reply):
 
-            self.skeletonOutPort.setEnvelope(ebottle)
-            self.skeletonOutPort.write(bottle)
+        success = False
+        command = bottle.toString().split(' ')
 
+        if command[0] == 'set' and len(command) > 2 and command[1] == 'joints':
 
-    def respond(self, command, reply):
+            try:
+                self.used_joints = sorted(set( parseJoint(name) for name in command[2:] ))
+                success = True
+            except ValueError:
+                pass
+
+        elif command[0] == 'get' and len(command) > 1 and command[1] == 'joints':
+
+            for joint in self.used_joints:
+                reply.addString(TSUserSkeleton.JOINT_NAMES[joint])
+            return True
+
+        # everything else is handled by the base module e.g. 'stats'
+        if not success:
+            return BaseModule.respond(self, bottle, reply)
+
+        reply.addString('ack')
         return True
 
 
+def parseJoint(name):
+    """ This function returns the joint for an output label e.g. 'Left_Hand', case is ignored.
+
+    @param name - joint label
+    @return joint @see TSSkeleton joint constants
+    """
+    for joint, label in TSUserSkeleton.JOINT_NAMES.items():
+        if label.lower() == name.lower():
+            return joint
+
+    raise ValueError('unknown joint: %s' % name)
+
+
+def createArgParser():
+    """ This method creates a base argument parser.
+
+    @return Argument Parser object
+    """
+    parser = argparse.ArgumentParser(description='Create a SensorModule for Yarp.')
+    parser.add_argument( '-n', '--name',
+                         dest       = 'name',
+                         default    = '',
+                         help       = 'Name prefix for Yarp port names')
+
+    parser.add_argument( '-j', '--joints',
+                         dest       = 'joints',
+                         type       = parseJoint,
+                         nargs      = '+',
+                         default    = None,
+                         help       = 'Joints to publish e.g. Head Left_Hand Right_Hand Chest.')
+
+    parser.add_argument( '-b', '--batch',
+                         dest       = 'batch',
+                         action     = 'store_true',
+                         help       = 'Publish all users of a frame in one message.')
+
+    addStatsArguments(parser)
+    addScheduleArguments(parser)
+
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
-    main(TSUserSkeleton)
+    main(TSUserSkeleton, createArgParser())
@@ -16,8 +16,11 @@
 #    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
 ####################################################################################################
 
-# short cut for imports
-from spy.modules.BaseModule     import BaseModule
-from spy.modules.HCMarker       import HCMarker
-from spy.modules.OCFaceDetector import OCFaceDetector
-from spy.modules.TSUserSkeleton import TSUserSkeleton
+from spy.utils.lazy import lazyModule
+
+
+# short cut for imports; loaded on first access
+lazyModule(__name__, { 'BaseModule':     ('spy.modules.BaseModule',     'BaseModule'),
+                       'HCMarker':       ('spy.modules.HCMarker',       'HCMarker'),
+                       'OCFaceDetector': ('spy.modules.OCFaceDetector', 'OCFaceDetector'),
+                       'TSUserSkeleton': ('spy.modules.TSUserSkeleton', 'TSUserSkeleton') })
@@ -16,6 +16,10 @@
 #    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
 ####################################################################################################
 
-# short cut for imports
-from spy.reader.bottle_reader       import BottleReader
-from spy.reader.ts_skeleton_reader  import TSSkeletonReader
+from spy.utils.lazy import lazyModule
+
+
+# short cut for imports; loaded on first access
+lazyModule(__name__, { 'BottleEvents':     ('spy.reader.bottle_reader',      'BottleEvents'),
+                       'BottleReader':     ('spy.reader.bottle_reader',      'BottleReader'),
+                       'TSSkeletonReader': ('spy.reader.ts_skeleton_reader', 'TSSkeletonReader') })
@@ -15,12 +15,110 @@
 #    You should have received a copy of the GNU Affero General Public License                      #
 #    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
 ####################################################################################################
-from yarp import Bottle, Value
+# events of the bottle event stream
+E_VOCAB      = 'vocab'
+E_DOUBLE     = 'double'
+E_INT        = 'int'
+E_STRING     = 'string'
+E_LIST_START = 'list start'
+E_LIST_END   = 'list end'
+
+
+class BottleEvents(object):
+    """ The BottleEvents class provides a non-recursive event stream over a yarp bottle. It iterates
+        over (event, value, depth) tuples in document order, the depth of the top level values is 0.
+
+        A list yields E_LIST_START with the list value and E_LIST_END with None, both at the depth
+        of the list itself. Call skip() right after E_LIST_START to jump to the matching E_LIST_END
+        without reading the values in between.
+    """
+
+    # type codes of yarp values that are the same in all yarp versions
+    CODES = { 1:  E_INT,
+              4:  E_STRING,
+              9:  E_VOCAB,
+              10: E_DOUBLE }
+
+
+    def __init__(self, bottle):
+        """ This method creates the event stream.
+
+        @param bottle - Yarp Bottle
+        """
+        self._stack = [ [ bottle, 0, bottle.size() ] ]
+
+
+    def __iter__(self):
+        return self
+
+
+    def skip(self):
+        """ This method skips the values of the list that was started last. """
+        if len(self._stack) > 1:
+            self._stack[-1][1] = self._stack[-1][2]
+
+
+    def next(self):
+        stack = self._stack
+
+        while stack:
+            frame = stack[-1]
+
+            # list finished
+            if frame[1] >= frame[2]:
+                stack.pop()
+
+                if stack:
+                    return E_LIST_END, None, len(stack) - 1
+
+                continue
+
+            value     = frame[0].get(frame[1])
+            frame[1] += 1
+
+            event     = BottleEvents.CODES.get(value.getCode())
+
+            if event is None:
+                event = BottleEvents.getEvent(value)
+
+            if event == E_LIST_START:
+                items = value.asList()
+                stack.append([ items, 0, items.size() ])
+                return event, value, len(stack) - 2
+
+            return event, value, len(stack) - 1
+
+        raise StopIteration
+
+
+    @staticmethod
+    def getEvent(value):
+        """ This method returns the event for values without a fixed type code.
+
+        @param value - Yarp Value
+        """
+
+        if value.isVocab():
+            return E_VOCAB
+
+        elif value.isDouble():
+            return E_DOUBLE
+
+        elif value.isInt():
+            return E_INT
+
+        elif value.isString():
+            return E_STRING
+
+        elif value.isList():
+            return E_LIST_START
+
+        raise NotImplementedError('Value type is not known to the parser: %s' % value.toString())
 
 
 class BottleReader(object):
     """ The BottleReader class provides an abstract, simple tree walker base class for complex yarp
-        bottles.
+        bottles. The hook methods are called from the BottleEvents stream.
     """
 
     E_ABSTRACT_CALL = 'Call of an abstract method. Implement if you inherit from BottleReader!'
@@ -47,35 +145,21 @@ class BottleReader(object):
         @param bottle - Yarp Bottle
         """
 
-        for idx in range(bottle.size()):
-            item = bottle.get(idx)
+        hooks = { E_VOCAB:  self.readVocab,
+                  E_DOUBLE: self.readDouble,
+                  E_INT:    self.readInt,
+                  E_STRING: self.readString }
 
-            if isinstance(item, Value):
-                self._readValue(item)
+        for event, value, _ in BottleEvents(bottle):
 
-            elif isinstance(item, Bottle):
-                self._readBottle(item)
+            if event == E_LIST_START:
+                self.onListStart()
 
+            elif event == E_LIST_END:
+                self.onListEnd()
 
-    def _readValue(self, value):
-        """ This protected method is used to call the hook methods for each value type. """
-
-        if value.isVocab():
-            self.readVocab(value)
-
-        elif value.isDouble():
-            self.readDouble(value)
-
-        elif value.isInt():
-            self.readInt(value)
-
-        elif value.isList():
-            self.onListStart()
-            self._readBottle( value.asList() )
-            self.onListEnd()
-
-        else:
-            raise NotImplementedError('Value type is not known to the parser: %s' % value)
+            else:
+                hooks[event](value)
 
 
     def getData(self):
@@ -105,6 +189,13 @@ class BottleReader(object):
         raise NotImplementedError(BottleReader.E_ABSTRACT_CALL)
 
 
+    def readString(self, value):
+        """ This method is the hook method to read string values. Strings are skipped unless a
+            subclass reads them.
+        """
+        pass
+
+
     def onListStart(self):
         """ This method is the hook method that is called if a new list was found. """
         pass
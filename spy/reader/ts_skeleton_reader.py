@@ -17,40 +17,127 @@
 ####################################################################################################
 import time
 
+import numpy as np
+
 from spy.reader.bottle_reader import BottleReader
 from spy.models.ts_skeleton   import TSSkeleton
 
 
 class TSSkeletonReader(BottleReader):
     """ The TSSkeletonReader class provides a BottleReader for the transformation from
-        OpenNI2DeviceServer skeleton to the TutorSpotter skeleton.
+        OpenNI2DeviceServer skeleton to the TutorSpotter skeleton. The values are written straight
+        into the joint arrays of the skeletons.
+
+        Bottles with the fixed OpenNI2 layout are parsed in bulk from their text form:
+
+            USER <id> (POS (x y z) confidence ORI (q1 q2 q3 q4) confidence) ... for each joint
+
+        Any other bottle falls back to the generic tree walker of the BottleReader.
+
+        Only the joints given as joint mask are decoded, the other joints of the skeletons stay
+        zero.
     """
 
+    # USER id, then per joint: POS x y z confidence ORI q1 q2 q3 q4 confidence
+    USER_TOKENS = 2 + TSSkeleton.JOINTS * 11
+
+
+    def __init__(self, bottle, create_time = None, joints = None):
+        """ This method creates the reader and parses the bottle.
+
+        @param bottle      - Yarp Bottle
+        @param create_time - optional creation time of the skeletons
+        @param joints      - optional list of joints to decode, defaults to all joints
+        """
+        self.joints      = range(TSSkeleton.JOINTS) if joints is None else sorted(joints)
+        self.mask        = [ joint in self.joints for joint in range(TSSkeleton.JOINTS) ]
 
-    def __init__(self, bottle, create_time = None):
         self.mode        = None
-        self.cur_user    = 0
-        self.cur_joint   = 0
+        self.cur_user    = None
+        self.cur_joint   = -1
+        self.cur_value   = 0
         self.create_time = create_time
+        self.data        = {}
+
+        if not self._readSkeletons(bottle):
+            BottleReader.__init__(self, bottle)
+
+
+    def _readSkeletons(self, bottle):
+        """ This protected method parses bottles with the fixed OpenNI2 skeleton layout. All values
+            are converted at once and copied into the joint arrays.
+
+        @param bottle - Yarp Bottle
+        @return boolean - False if the bottle does not match the layout
+        """
+
+        # vocabs may be printed in brackets, lists are in parentheses
+        tokens = bottle.toString().translate(None, '()[]').split()
+        size   = TSSkeletonReader.USER_TOKENS
+        data   = {}
 
-        BottleReader.__init__(self, bottle)
+        if not tokens or len(tokens) % size:
+            return False
+
+        for start in range(0, len(tokens), size):
+            user = tokens[start:start + size]
+
+            if ( user[0] != 'USER' or user[2::11].count('POS') != TSSkeleton.JOINTS or
+                 user[7::11].count('ORI') != TSSkeleton.JOINTS ):
+                return False
+
+            # drop the ORI and then the POS vocabs, nine values per joint remain
+            del user[7::11]
+            del user[2::10]
+
+            values = [ value for joint in self.joints
+                             for value in user[2 + 9 * joint:11 + 9 * joint] ]
+
+            try:
+                skeleton = TSSkeleton(int(user[1]))
+                values   = np.array(map(float, values)).reshape(len(self.joints), 9)
+            except ValueError:
+                return False
+
+            skeleton.positions[self.joints]       = values[:, :4]
+            skeleton.quaternions[self.joints]     = values[:, 4:8]
+            skeleton.ori_confidences[self.joints] = values[:, 8]
+            data[skeleton.uid]                    = skeleton
+
+        self.data = data
+        return True
 
 
     def readVocab(self, value):
-        self.mode = value.asString()
+        self.mode      = value.asString()
+        self.cur_value = 0
 
         if self.mode == 'POS':
-            self.data[self.cur_user].append( { 'POS' : [], 'ORI' : [] } )
+            self.cur_joint += 1
 
 
     def readDouble(self, value):
-        self.data[self.cur_user][-1][self.mode].append(value.asDouble())
+
+        if not self.mask[self.cur_joint]:
+            return
+
+        elif self.mode == 'POS':
+            self.cur_user.positions[self.cur_joint, self.cur_value] = value.asDouble()
+
+        elif self.cur_value < 4:
+            self.cur_user.quaternions[self.cur_joint, self.cur_value] = value.asDouble()
+
+        else:
+            self.cur_user.ori_confidences[self.cur_joint] = value.asDouble()
+
+        self.cur_value += 1
 
 
     def readInt(self, value):
         if self.mode == 'USER':
-            self.cur_user = value.asInt()
-            self.data[self.cur_user] = []
+            self.cur_user  = TSSkeleton(value.asInt())
+            self.cur_joint = -1
+            self.data[self.cur_user.uid] = self.cur_user
 
         else:
             print 'wrong mode', self.mode
@@ -63,6 +150,6 @@ class TSSkeletonReader(BottleReader):
             create_time = self.create_time
 
         for key in self.data:
-            self.data[key] = TSSkeleton(key, self.data[key], create_time)
+            self.data[key].create_time = create_time
 
         return BottleReader.getData(self)
@@ -19,8 +19,7 @@ import os
 import os.path as op
 import subprocess
 
-# short cut for imports
-from spy.utils.factory import YarpFactory
+from spy.utils.lazy import lazyModule
 
 
 def getFiles(_path):
@@ -109,3 +108,8 @@ def executeWithLogs(cmd, name = 'log', directory = '/tmp', append = False):
     return subprocess.Popen( cmd,
                              stdout = open(op.join(directory, '%s_stdout.txt' % name), mode),
                              stderr = open(op.join(directory, '%s_stderr.txt' % name), mode) )
+
+
+# short cut for imports; loaded on first access
+lazyModule(__name__, { 'YarpFactory':     ('spy.utils.factory',  'YarpFactory'),
+                       'CascadeRegistry': ('spy.utils.cascades', 'CascadeRegistry') })
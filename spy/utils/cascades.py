@@ -0,0 +1,133 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+import os
+import os.path as op
+import threading
+
+
+# environment variable holding the cascade search path; entries are separated by os.pathsep
+ENV_CASCADE_PATH = 'SPY_CASCADE_PATH'
+
+DEFAULT_PATHS    = [ '/usr/local/share/opencv/haarcascades',
+                     '/usr/local/share/opencv/lbpcascades',
+                     '/usr/share/opencv/haarcascades',
+                     '/usr/share/opencv/lbpcascades' ]
+
+# file name prefixes tried when looking up a cascade by name
+PREFIXES         = [ 'haarcascade_', '' ]
+
+
+class CascadeRegistry(object):
+    """ The CascadeRegistry class provides dictionary-like access to OpenCV cascade classifiers.
+        A classifier is loaded the first time it is requested and then kept for all later lookups.
+
+        Example:
+
+            >>> registry = CascadeRegistry()
+            >>> faces    = registry['frontalface_default'].detectMultiScale(gray, 1.3, 5)
+
+        The name 'frontalface_default' resolves to 'haarcascade_frontalface_default.xml' within the
+        first directory of the search path that contains it. The search path is taken from
+        setPaths, the SPY_CASCADE_PATH environment variable or the OpenCV default locations in
+        that order.
+    """
+
+
+    def __init__(self, paths = None):
+        """ This method creates an empty registry.
+
+        @param paths - list of directories to search for cascade files (default: None)
+        """
+        self._paths       = paths
+        self._classifiers = {}
+        self._lock        = threading.Lock()
+
+
+    def setPaths(self, paths):
+        """ This method sets the directories to search for cascade files. Classifiers that are
+            already loaded are kept.
+
+        @param paths - list of directories or a string with directories separated by os.pathsep
+        """
+        if isinstance(paths, type('')):
+            paths = [ path for path in paths.split(os.pathsep) if path ]
+
+        self._paths = paths
+
+
+    def getPaths(self):
+        """ This method returns the directories that are searched for cascade files.
+
+        @return list of directories
+        """
+        if self._paths:
+            return self._paths
+
+        if os.environ.get(ENV_CASCADE_PATH):
+            return [ path for path in os.environ[ENV_CASCADE_PATH].split(os.pathsep) if path ]
+
+        return DEFAULT_PATHS
+
+
+    def findFile(self, name):
+        """ This method returns the file path of the cascade with the given name.
+
+        @param name - name of the cascade e.g. 'eye' or 'frontalface_default'
+        @return file path or None if no cascade file was found
+        """
+        for path in self.getPaths():
+            for prefix in PREFIXES:
+                filename = op.join(path, '%s%s.xml' % (prefix, name))
+
+                if op.isfile(filename):
+                    return filename
+
+        return None
+
+
+    def __getitem__(self, name):
+
+        classifier = self._classifiers.get(name)
+        if classifier is not None:
+            return classifier
+
+        with self._lock:
+
+            if name not in self._classifiers:
+
+                filename = self.findFile(name)
+                if filename is None:
+                    raise KeyError('No cascade [%s] in %s.' % (name, self.getPaths()))
+
+                import cv2
+                self._classifiers[name] = cv2.CascadeClassifier(filename)
+
+            return self._classifiers[name]
+
+
+    def __contains__(self, name):
+        return name in self._classifiers or self.findFile(name) is not None
+
+
+    def isLoaded(self, name):
+        """ This method returns whether the cascade with the given name is already loaded.
+
+        @param name - name of the cascade
+        @return boolean
+        """
+        return name in self._classifiers
@@ -15,9 +15,13 @@
 #    You should have received a copy of the GNU Affero General Public License                      #
 #    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
 ####################################################################################################
+from multiprocessing.sharedctypes import RawArray
+
 import numpy as np
 import yarp
 
+from spy.utils.ports import ImageInputPort, ImageOutputPort
+
 
 EMSG_YARP_NOT_FOUND = "Could not connect to the yarp server. Try running 'yarp detect'."
 
@@ -47,6 +51,12 @@ class YarpFactory(object):
         if mode == 'buffered':
             port = yarp.BufferedPortBottle()
 
+        elif mode == 'image' and name.endswith(':i'):
+            port = ImageInputPort()
+
+        elif mode == 'image':
+            port = ImageOutputPort()
+
         elif mode == 'rpcclient':
             port = yarp.RpcClient()
 
@@ -83,6 +93,11 @@ class YarpFactory(object):
     def createInputPort(self, name, mode = 'unbuffered'):
         """ This method returns an input port.
 
+        Modes:
+            'unbuffered' - yarp.Port
+            'buffered'   - yarp.BufferedPortBottle
+            'image'      - ImageInputPort; always reads the newest image and counts dropped ones
+
         @param obj      - the object that the port is created for
         @param name     - if a name is provided it gets appended to the modules name
         @param buffered - if buffered is True a buffered port will be used otherwise not;
@@ -95,6 +110,11 @@ class YarpFactory(object):
     def createOutputPort(self, name, target = None, mode = 'unbuffered'):
         """ This method returns an output port.
 
+        Modes:
+            'unbuffered' - yarp.Port
+            'buffered'   - yarp.BufferedPortBottle
+            'image'      - ImageOutputPort; writes images without waiting for slow readers
+
         @param obj      - the object that the port is created for
         @param name     - if a name is provided it gets appended to the modules name
         @param buffered - if buffered is True a buffered port will be used otherwise not;
@@ -137,13 +157,17 @@ class YarpFactory(object):
 
 
     @staticmethod
-    def createImageBuffer(width = 320, height = 240, channels = 3):
+    def createImageBuffer(width = 320, height = 240, channels = 3, shared = False):
         """ This method creates image buffers with the specified \a width, \a height and number of
             color channels \a channels.
 
+        If \a shared is True the buffer array is placed in shared memory. Processes forked after
+        the creation see the same pixels without copying or pickling them.
+
         @param width    - integer specifying the width of the image   (default: 320)
         @param height   - integer specifying the height of the image  (default: 240)
         @param channels - integer specifying number of color channels (default: 3)
+        @param shared   - boolean specifying whether to use shared memory (default: False)
         @return image, buffer array
         """
 
@@ -151,13 +175,21 @@ class YarpFactory(object):
             buf_image = yarp.ImageFloat()
             buf_image.resize(width, height)
 
-            buf_array = np.zeros((height, width), dtype = np.float32)
+            shape     = (height, width)
+            dtype     = np.float32
 
         else:
             buf_image = yarp.ImageRgb()
             buf_image.resize(width, height)
 
-            buf_array = np.zeros((height, width, channels), dtype = np.uint8)
+            shape     = (height, width, channels)
+            dtype     = np.uint8
+
+        if shared:
+            size      = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            buf_array = np.frombuffer(RawArray('B', size), dtype = dtype).reshape(shape)
+        else:
+            buf_array = np.zeros(shape, dtype = dtype)
 
         buf_image.setExternal( buf_array,
                                buf_array.shape[1],
@@ -166,6 +198,59 @@ class YarpFactory(object):
         return buf_image, buf_array
 
 
+    @staticmethod
+    def resizeImageBuffer(buf_image, buf_array, width, height, shared = False):
+        """ This method returns image buffers with the specified \a width and \a height. The given
+            buffers are returned if they already have that size, otherwise new ones are created.
+
+        @param buf_image - yarp image created by createImageBuffer
+        @param buf_array - buffer array of the yarp image
+        @param width     - integer specifying the width of the image
+        @param height    - integer specifying the height of the image
+        @param shared    - boolean specifying whether to use shared memory (default: False)
+        @return image, buffer array
+        """
+        if buf_array.shape[:2] == (height, width):
+            return buf_image, buf_array
+
+        channels = buf_array.shape[2] if buf_array.ndim == 3 else 1
+        return YarpFactory.createImageBuffer(width, height, channels, shared)
+
+
+    @staticmethod
+    def refreshImageBuffer(buf_image, buf_array, shared = False):
+        """ This method checks whether the buffer array is still the memory of the image. Reading an
+            image of a different resolution makes yarp re-allocate the image. In that case new
+            buffers of the new resolution are created and the pixels are copied into them once.
+            Later reads of the same resolution go into the new buffers without any allocation.
+
+        @param buf_image - yarp image created by createImageBuffer
+        @param buf_array - buffer array of the yarp image
+        @param shared    - boolean specifying whether to use shared memory (default: False)
+        @return image, buffer array
+        """
+        if buf_array.__array_interface__['data'][0] == buf_image.getRawImage().__long__():
+            return buf_image, buf_array
+
+        channels             = buf_array.shape[2] if buf_array.ndim == 3 else 1
+        new_image, new_array = YarpFactory.createImageBuffer( buf_image.width(),
+                                                              buf_image.height(),
+                                                              channels,
+                                                              shared )
+        new_image.copy(buf_image)
+        return new_image, new_array
+
+
+    @staticmethod
+    def hasReaders(port):
+        """ This method returns whether anyone is connected to the given output port.
+
+        @param port - yarp port
+        @result boolean
+        """
+        return port.getOutputCount() > 0
+
+
     @staticmethod
     def connect(source_port, target_port):
         """ This method connects two ports.
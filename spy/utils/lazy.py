@@ -0,0 +1,116 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """ The LazyModule class provides a package module whose short cut attributes are imported on
+        first access instead of at import time of the package.
+
+        Each lazy attribute is given as a pair of the defining module and the attribute name. If a
+        submodule has the same name as the attribute (e.g. spy.modules.HCMarker), the import
+        system puts the submodule into the package namespace. Such a submodule entry is replaced
+        by the attribute on access so that both import orders result in the same object.
+    """
+
+
+    def __init__(self, module, attributes):
+        """ This method creates the lazy module based on an already initialized package module.
+
+        @param module     - the package module that gets replaced
+        @param attributes - dictionary mapping attribute names to (module name, attribute name)
+        """
+        types.ModuleType.__init__(self, module.__name__, module.__doc__)
+        self.__dict__.update(module.__dict__)
+
+        # keep the original module alive; python 2 clears the globals of collected modules
+        self.__dict__['_LazyModule__module']     = module
+        self.__dict__['_LazyModule__attributes'] = attributes
+
+        if '__all__' not in self.__dict__:
+            self.__dict__['__all__'] = LazyModule.getPublicNames(module, attributes)
+
+
+    @staticmethod
+    def getPublicNames(module, attributes):
+        """ This method returns the names a star import of the package exports: its public names
+            except the lazy module helpers, the lazy attributes and the submodules defining them,
+            as the package exported them when it imported its short cuts directly.
+
+        @param module     - the package module
+        @param attributes - dictionary mapping attribute names to (module name, attribute name)
+        @return sorted list of names
+        """
+        prefix = module.__name__ + '.'
+        names  = set(attributes)
+
+        # the lazy module helpers were not part of the package before
+        for name, value in module.__dict__.items():
+            helper = ( value is sys.modules[__name__]
+                       or getattr(value, '__module__', None) == __name__ )
+
+            if not name.startswith('_') and not helper:
+                names.add(name)
+
+        for module_name, _ in attributes.values():
+            if module_name.startswith(prefix) and '.' not in module_name[len(prefix):]:
+                names.add(module_name[len(prefix):])
+
+        return sorted(names)
+
+
+    def __getattribute__(self, name):
+
+        namespace  = types.ModuleType.__getattribute__(self, '__dict__')
+        attributes = namespace.get('_LazyModule__attributes', {})
+
+        if name in attributes:
+            value       = namespace.get(name)
+            module_name = attributes[name][0]
+
+            if value is None or getattr(value, '__name__', None) == module_name:
+                value           = getattr(importlib.import_module(module_name), attributes[name][1])
+                namespace[name] = value
+
+            return value
+
+        return types.ModuleType.__getattribute__(self, name)
+
+
+    def __dir__(self):
+        names = [ name for name in self.__dict__ if not name.startswith('_LazyModule__') ]
+        return sorted(set(names) | set(self.__dict__['_LazyModule__attributes']))
+
+
+def lazyModule(name, attributes):
+    """ This function replaces the module with the given name by a LazyModule. It is meant to be
+        called at the end of a package's __init__ file.
+
+        Example:
+
+            >>> lazyModule(__name__, { 'YarpFactory': ('spy.utils.factory', 'YarpFactory') })
+
+    @param name       - name of the module to replace
+    @param attributes - dictionary mapping attribute names to (module name, attribute name)
+    @return LazyModule object
+    """
+    module            = LazyModule(sys.modules[name], attributes)
+    sys.modules[name] = module
+    return module
@@ -0,0 +1,103 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+import collections
+import time
+
+
+class MarkerMemory(object):
+    """ The MarkerMemory class provides a temporal store for markers. The markers are kept ordered
+        by the time they were last seen, so expired markers are always at the front and are evicted
+        in amortized O(1) per marker. Lookup and update are O(1) as well.
+
+        Example:
+
+            >>> memory  = MarkerMemory(2.0, size = 100)
+            >>> markers = memory.update(detected_markers)
+    """
+
+
+    def __init__(self, length, size = 0):
+        """ This method creates the memory.
+
+        @param length - number of seconds a marker is remembered, 0 disables the memory
+        @param size   - maximal number of remembered markers, 0 means no limit
+        """
+        self.length   = length
+        self.size     = size
+        self._entries = collections.OrderedDict()
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+    def __contains__(self, mid):
+        return mid in self._entries
+
+
+    def get(self, mid):
+        """ This method returns the remembered marker with the given id.
+
+        @param mid - marker id
+        @return marker or None
+        """
+        entry = self._entries.get(mid)
+        return entry[0] if entry else None
+
+
+    def update(self, markers, now = None):
+        """ This method stores the given markers as last seen at the given time, evicts the expired
+            markers and returns all remembered ones.
+
+        @param markers - list of markers with an id attribute
+        @param now     - time stamp in seconds, defaults to the current time
+        @return list of markers, the given ones last
+        """
+        now     = time.time() if now is None else now
+        entries = self._entries
+
+        for marker in markers:
+
+            # re-insert so that the entry moves to the end of the order
+            entries.pop(marker.id, None)
+            entries[marker.id] = ( marker, now )
+
+        self.expire(now)
+
+        return [ entry[0] for entry in entries.itervalues() ]
+
+
+    def expire(self, now = None):
+        """ This method evicts the markers that are older than the memory length and the oldest
+            markers exceeding the size limit.
+
+        @param now - time stamp in seconds, defaults to the current time
+        """
+        now     = time.time() if now is None else now
+        entries = self._entries
+
+        while entries and now - next(entries.itervalues())[1] >= self.length:
+            entries.popitem(last = False)
+
+        while self.size > 0 and len(entries) > self.size:
+            entries.popitem(last = False)
+
+
+    def clear(self):
+        """ This method removes all markers. """
+        self._entries.clear()
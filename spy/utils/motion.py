@@ -0,0 +1,142 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+import time
+
+import numpy as np
+
+
+class MotionGate(object):
+    """ The MotionGate class provides a cheap change detector for image frames. A frame is compared
+        with the last processed frame on a downsampled copy. It counts as changed if the mean
+        absolute difference of one of the BLOCKS x BLOCKS blocks exceeds the threshold, so local
+        motion is not averaged away by a static background.
+
+        Frames are always processed if the gate is disabled (threshold 0), if there is no reference
+        frame yet, if the resolution changed or if refresh seconds have passed since the last
+        processed frame.
+
+        Example:
+
+            >>> gate = MotionGate(threshold = 4.0, refresh = 5.0)
+            >>> if gate.hasChanged(image):
+            >>>     faces = detect(image)
+    """
+
+    # width of the downsampled frame and number of blocks per side
+    WIDTH  = 80
+    BLOCKS = 8
+
+
+    def __init__(self, threshold = 0.0, refresh = 5.0):
+        """ This method creates the gate.
+
+        @param threshold - mean absolute gray level difference of a block; 0 disables the gate
+        @param refresh   - seconds after which a frame is processed even if nothing changed
+        """
+        self.threshold  = threshold
+        self.refresh    = refresh
+        self.checked    = 0
+        self.skipped    = 0
+        self._reference = None
+        self._processed = 0.0
+
+        # downsampled frame buffers; the reference is held by the spare buffer. They are
+        # re-allocated only if the resolution changes
+        self._current   = None
+        self._spare     = None
+        self._diff      = None
+
+
+    def isEnabled(self):
+        return self.threshold > 0
+
+
+    def hasChanged(self, image, now = None):
+        """ This method checks whether the frame has to be processed. If so it becomes the new
+            reference frame.
+
+        @param image - image array
+        @param now   - time stamp in seconds, defaults to the current time
+        @return boolean - False if the frame can be skipped
+        """
+        if not self.isEnabled():
+            return True
+
+        now           = time.time() if now is None else now
+        step          = max(1, image.shape[1] // MotionGate.WIDTH)
+        sampled       = image[::step, ::step]
+        self.checked += 1
+
+        if self._current is None or self._current.shape != sampled.shape:
+            self._current   = np.empty(sampled.shape, dtype = np.int16)
+            self._spare     = np.empty(sampled.shape, dtype = np.int16)
+            self._diff      = np.empty(sampled.shape, dtype = np.int16)
+            self._reference = None
+
+        small         = self._current
+        np.copyto(small, sampled)
+
+        if ( self._reference is None or
+             now - self._processed >= self.refresh or
+             self.getDifference(small, self._reference, self._diff) > self.threshold ):
+
+            # the frame becomes the reference; the buffer of the old one takes the next frame
+            self._reference            = small
+            self._current, self._spare = self._spare, small
+            self._processed = now
+            return True
+
+        self.skipped += 1
+        return False
+
+
+    @staticmethod
+    def getDifference(image, reference, diff = None):
+        """ This method returns the largest mean absolute difference of the blocks of two frames.
+
+        @param image     - downsampled frame as int16 array
+        @param reference - downsampled reference frame of the same shape
+        @param diff      - optional int16 buffer of the same shape for the difference
+        @return float
+        """
+        diff = np.subtract(image, reference, out = diff)
+        diff = np.abs(diff, out = diff)
+
+        if diff.ndim == 3:
+            diff = diff.mean(axis = 2)
+
+        height, width = diff.shape
+        block_h       = max(1, height // MotionGate.BLOCKS)
+        block_w       = max(1, width  // MotionGate.BLOCKS)
+        rows          = height // block_h
+        cols          = width  // block_w
+
+        blocks = diff[:rows * block_h, :cols * block_w].reshape(rows, block_h, cols, block_w)
+        return blocks.mean(axis = (1, 3)).max()
+
+
+    def invalidate(self):
+        """ This method drops the reference frame so that the next frame is processed. """
+        self._reference = None
+
+
+    def reset(self):
+        """ This method drops the reference frame and clears the counters. """
+        self.checked    = 0
+        self.skipped    = 0
+        self._reference = None
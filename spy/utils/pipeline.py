@@ -0,0 +1,255 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+import collections
+import threading
+import time
+import traceback
+
+
+class DropQueue(object):
+    """ The DropQueue class provides a bounded FIFO queue that never blocks the producer. If the
+        queue is full the oldest item is dropped to make room for the new one.
+    """
+
+
+    def __init__(self, maxsize = 1):
+        """ This method creates the queue.
+
+        @param maxsize - maximal number of items the queue holds (default: 1)
+        """
+        self.maxsize    = max(1, maxsize)
+        self.dropped    = 0
+        self.closed     = False
+        self._items     = collections.deque()
+        self._condition = threading.Condition()
+
+
+    def put(self, item):
+        """ This method adds an item to the queue and drops the oldest item if the queue is full.
+
+        @param item - the item to add
+        """
+        with self._condition:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+
+            self._items.append(item)
+            self._condition.notify()
+
+
+    def get(self, timeout = None):
+        """ This method returns the oldest item of the queue. It blocks until an item is available,
+            the timeout is reached or the queue got closed.
+
+        @param timeout - timeout in seconds; None waits forever (default: None)
+        @return item or None if no item was available
+        """
+        with self._condition:
+            if not self._items and not self.closed:
+                self._condition.wait(timeout)
+
+            if self._items:
+                return self._items.popleft()
+
+        return None
+
+
+    def close(self):
+        """ This method closes the queue and wakes up all waiting consumers. """
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+    def qsize(self):
+        """ This method returns the number of items currently in the queue. """
+        return len(self._items)
+
+
+class Stage(threading.Thread):
+    """ The Stage class provides a worker thread that takes items from an input queue, processes
+        them with a given function and puts the result into an output queue.
+
+        A stage without input queue is a source stage. Its function is called with None and the
+        result is used as new item. A function returning None does not produce an item.
+
+        An exception raised by the function drops the item. It is logged and counted as error and
+        the stage goes on with the next item.
+    """
+
+    TIMEOUT = 0.1
+
+
+    def __init__(self, name, func, in_queue = None, out_queue = None):
+        """ This method creates the stage.
+
+        @param name      - name of the stage used for the statistics
+        @param func      - function processing one item
+        @param in_queue  - DropQueue the items are taken from; None for a source stage
+        @param out_queue - DropQueue the results are put into; None for a sink stage
+        """
+        threading.Thread.__init__(self, name = name)
+        self.daemon     = True
+        self.func       = func
+        self.in_queue   = in_queue
+        self.out_queue  = out_queue
+
+        self.processed  = 0
+        self.errors     = 0
+        self.busy_time  = 0.0
+        self.start_time = None
+        self._running   = False
+
+
+    def run(self):
+        self.start_time = time.time()
+        self._running   = True
+
+        while self._running:
+
+            if self.in_queue is not None:
+                item = self.in_queue.get(Stage.TIMEOUT)
+                if item is None:
+                    continue
+            else:
+                item = None
+
+            start  = time.time()
+
+            try:
+                result = self.func(item)
+            except Exception:
+                result = None
+                self.errors += 1
+
+                # the first error is logged with its trace, later ones in one line
+                if self.errors == 1:
+                    print '[Pipeline] Stage [%s] failed:' % self.name
+                    traceback.print_exc()
+                else:
+                    message = traceback.format_exc().splitlines()[-1]
+                    print '[Pipeline] Stage [%s] failed (%d errors): %s' % ( self.name,
+                                                                           self.errors,
+                                                                           message )
+
+            self.busy_time += time.time() - start
+            self.processed += 1
+
+            if result is not None and self.out_queue is not None:
+                self.out_queue.put(result)
+
+
+    def stop(self):
+        """ This method signals the stage to stop after the current item. """
+        self._running = False
+
+        if self.in_queue is not None:
+            self.in_queue.close()
+
+
+    def getStats(self):
+        """ This method returns the statistics of the stage.
+
+        @return dictionary containing processed items, errors, occupancy, queue size and dropped
+                items
+        """
+        elapsed = time.time() - self.start_time if self.start_time else 0.0
+
+        return { 'name':      self.name,
+                 'processed': self.processed,
+                 'errors':    self.errors,
+                 'occupancy': self.busy_time / elapsed if elapsed > 0 else 0.0,
+                 'queue':     self.in_queue.qsize()  if self.in_queue is not None else 0,
+                 'dropped':   self.in_queue.dropped  if self.in_queue is not None else 0 }
+
+
+class Pipeline(object):
+    """ The Pipeline class chains stages by bounded DropQueues. Each stage runs in its own thread
+        so that the frame rate is defined by the slowest stage instead of the sum of all stages.
+
+        Example:
+
+            >>> pipeline = Pipeline(queue_size = 1)
+            >>> pipeline.addStage('read',    read_frame)
+            >>> pipeline.addStage('detect',  detect)
+            >>> pipeline.addStage('publish', publish)
+            >>> pipeline.start()
+    """
+
+
+    def __init__(self, queue_size = 1):
+        """ This method creates an empty pipeline.
+
+        @param queue_size - size of the queues between the stages (default: 1)
+        """
+        self.queue_size = queue_size
+        self.stages     = []
+
+
+    def addStage(self, name, func):
+        """ This method appends a stage to the pipeline. The first stage is the source stage.
+
+        @param name - name of the stage
+        @param func - function processing one item
+        @return Stage object
+        """
+        in_queue = None
+
+        if self.stages:
+            in_queue = DropQueue(self.queue_size)
+            self.stages[-1].out_queue = in_queue
+
+        stage = Stage(name, func, in_queue)
+        self.stages.append(stage)
+        return stage
+
+
+    def start(self):
+        """ This method starts all stages. """
+        for stage in self.stages:
+            stage.start()
+
+
+    def stop(self, timeout = 1.0):
+        """ This method stops all stages and waits for them to finish.
+
+        @param timeout - time in seconds to wait for each stage (default: 1.0)
+        """
+        for stage in self.stages:
+            stage.stop()
+
+        for stage in self.stages:
+            if stage.is_alive():
+                stage.join(timeout)
+
+
+    def isAlive(self):
+        """ This method returns whether all stage threads are running.
+
+        @return boolean
+        """
+        return all( stage.is_alive() for stage in self.stages )
+
+
+    def getStats(self):
+        """ This method returns the statistics of all stages in pipeline order.
+
+        @return list of dictionaries @see Stage.getStats
+        """
+        return [ stage.getStats() for stage in self.stages ]
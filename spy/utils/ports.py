@@ -0,0 +1,105 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+import yarp
+
+
+class ImageInputPort(object):
+    """ The ImageInputPort class provides a buffered image input port with "latest frame wins"
+        semantics. The sender is never blocked by a slow reader. A read always returns the newest
+        frame and frames that arrived in between are dropped.
+
+        The dropped frames are counted based on the sequence numbers of the sender's envelope. If
+        the sender does not stamp its images no drops can be detected.
+
+        All other methods are forwarded to the underlying yarp.BufferedPortImageRgb.
+    """
+
+
+    def __init__(self):
+        self.port     = yarp.BufferedPortImageRgb()
+        self.port.setStrict(False)
+
+        self.frames   = 0
+        self.dropped  = 0
+        self._stamp   = yarp.Stamp()
+        self._last    = None
+
+
+    def __getattr__(self, name):
+        return getattr(self.port, name)
+
+
+    def read(self, buf_image):
+        """ This method waits for the newest frame and copies it into the given image.
+
+        @param buf_image - yarp image the frame is copied into
+        @return boolean - False if the port got interrupted
+        """
+        image = self.port.read(True)
+
+        if image is None:
+            return False
+
+        self.frames += 1
+
+        if self.port.getEnvelope(self._stamp) and self._stamp.isValid():
+            count = self._stamp.getCount()
+
+            # a lower count means the sender restarted
+            if self._last is not None and count > self._last + 1:
+                self.frames  += count - self._last - 1
+                self.dropped += count - self._last - 1
+
+            self._last = count
+
+        buf_image.copy(image)
+        return True
+
+
+class ImageOutputPort(object):
+    """ The ImageOutputPort class provides a buffered image output port with non-blocking writes.
+        A frame is not sent on connections that are still busy with the previous frame, so a slow
+        reader can not throttle the module. Such writes are counted as dropped.
+
+        All other methods are forwarded to the underlying yarp.BufferedPortImageRgb.
+    """
+
+
+    def __init__(self):
+        self.port    = yarp.BufferedPortImageRgb()
+        self.frames  = 0
+        self.dropped = 0
+
+
+    def __getattr__(self, name):
+        return getattr(self.port, name)
+
+
+    def write(self, buf_image):
+        """ This method sends a copy of the given image without waiting for the readers.
+
+        @param buf_image - yarp image to send
+        """
+        self.frames += 1
+
+        if self.port.isWriting():
+            self.dropped += 1
+
+        image = self.port.prepare()
+        image.copy(buf_image)
+        self.port.write()
@@ -0,0 +1,127 @@
+####################################################################################################
+#    Copyright (C) 2016 by Ingo Keller                                                             #
+#    <brutusthetschiepel@gmail.com>                                                                #
+#                                                                                                  #
+#    This file is part of SPY (A Sensor Module Package for Yarp).                                  #
+#                                                                                                  #
+#    SPY is free software: you can redistribute it and/or modify it under the terms of the         #
+#    GNU Affero General Public License as published by the Free Software Foundation, either        #
+#    version 3 of the License, or (at your option) any later version.                              #
+#                                                                                                  #
+#    SPY is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;              #
+#    without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.     #
+#    See the GNU Affero General Public License for more details.                                   #
+#                                                                                                  #
+#    You should have received a copy of the GNU Affero General Public License                      #
+#    along with SPY.  If not, see <http://www.gnu.org/licenses/>.                                  #
+####################################################################################################
+import collections
+import time
+
+
+class StageStats(object):
+    """ The StageStats class provides counters and a rolling latency window for a named processing
+        stage of a module. It is used as context manager to time one run of the stage.
+
+        Example:
+
+            >>> stage = StageStats('detect')
+            >>> with stage:
+            >>>     markers = detect_markers(image)
+            >>> stage.getPercentile(95)
+    """
+
+    # number of runs kept for the percentiles and the frame rate
+    WINDOW = 1000
+
+
+    def __init__(self, name, window = WINDOW):
+        """ This method creates the counters for a stage.
+
+        @param name   - name of the stage
+        @param window - number of runs kept for the percentiles and the frame rate
+        """
+        self.name      = name
+        self.count     = 0
+        self.skipped   = 0
+        self.total     = 0.0
+        self.durations = collections.deque(maxlen = window)
+        self.stamps    = collections.deque(maxlen = window)
+        self._start    = 0.0
+
+
+    def __enter__(self):
+        self._start = time.time()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        now = time.time()
+        self.add(now - self._start, now)
+
+
+    def add(self, duration, stamp = None):
+        """ This method adds one run of the stage.
+
+        @param duration - run time in seconds
+        @param stamp    - end time of the run; default is now
+        """
+        self.count += 1
+        self.total += duration
+        self.durations.append(duration)
+        self.stamps.append(stamp if stamp is not None else time.time())
+
+
+    def skip(self):
+        """ This method counts a skipped run of the stage. """
+        self.skipped += 1
+
+
+    def reset(self):
+        """ This method resets all counters. """
+        self.count   = 0
+        self.skipped = 0
+        self.total   = 0.0
+        self.durations.clear()
+        self.stamps.clear()
+
+
+    def getMean(self):
+        """ This method returns the mean run time in seconds. """
+        return self.total / self.count if self.count else 0.0
+
+
+    def getPercentile(self, percent):
+        """ This method returns a percentile of the run times within the rolling window.
+
+        @param percent - percentile between 0 and 100
+        @return run time in seconds
+        """
+        if not self.durations:
+            return 0.0
+
+        durations = sorted(self.durations)
+        return durations[int(round(percent / 100.0 * (len(durations) - 1)))]
+
+
+    def getFps(self):
+        """ This method returns the runs per second within the rolling window. """
+        if len(self.stamps) < 2 or self.stamps[-1] <= self.stamps[0]:
+            return 0.0
+
+        return (len(self.stamps) - 1) / (self.stamps[-1] - self.stamps[0])
+
+
+class NullStats(object):
+    """ The NullStats class provides a context manager that does nothing. It replaces StageStats
+        if the instrumentation is disabled.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+NULL_STATS = NullStats()